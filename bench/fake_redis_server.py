@@ -0,0 +1,222 @@
+"""
+Lightweight stand-in for redis-server used by the benchmarks.
+
+Reads `port`, `unixsocket` and `requirepass` from the config file given as the only
+argument and answers the handful of commands the manager sends
+(HELLO, AUTH, PING, INFO, CONFIG, BGSAVE, LASTSAVE, SHUTDOWN) plus GET/SET
+on an in-memory dict to simulate tenant traffic. BGSAVE writes the dict to
+`dir`/`dbfilename` (JSON, not a real RDB) and it is loaded again on start.
+Set FAKE_REDIS_LOADING_SECONDS to answer LOADING for a while after start.
+"""
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from collections import Counter
+
+
+def parse_config(path):
+    config = {}
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.strip().split(None, 1)
+            if len(parts) == 2 and not parts[0].startswith('#'):
+                config[parts[0].lower()] = parts[1].strip()
+    return config
+
+
+class Map(dict):
+    """Reply encoded as a RESP3 map"""
+
+
+def encode(value, protocol=2):
+    if isinstance(value, Map):
+        return f"%{len(value)}\r\n".encode() + b"".join(encode(k, protocol) + encode(v, protocol)
+                                                         for k, v in value.items())
+    if value is None:
+        return b"_\r\n" if protocol == 3 else b"$-1\r\n"
+    if isinstance(value, Exception):
+        return f"-{value}\r\n".encode()
+    if isinstance(value, bool):
+        return b"+OK\r\n" if value else b"$-1\r\n"
+    if isinstance(value, int):
+        return f":{value}\r\n".encode()
+    if isinstance(value, list):
+        return f"*{len(value)}\r\n".encode() + b"".join(encode(item, protocol) for item in value)
+    data = value.encode() if isinstance(value, str) else value
+    return b"$" + str(len(data)).encode() + b"\r\n" + data + b"\r\n"
+
+
+class FakeRedis:
+    def __init__(self, config):
+        self.config = config
+        self.password = config.get('requirepass')
+        self.started = time.time()
+        self.commands_processed = 0
+        self.connected_clients = 0
+        self.last_save = int(time.time())
+        self.command_calls = Counter()
+        self.data = {}
+        self.rdb_path = os.path.join(config.get('dir', '.'), config.get('dbfilename', 'dump.rdb'))
+        if os.path.exists(self.rdb_path):
+            with open(self.rdb_path, 'r') as f:
+                self.data = {bytes.fromhex(k): bytes.fromhex(v) for k, v in json.load(f).items()}
+        # Simulates a large RDB load: LOADING replies for this many seconds after start
+        self.loading_seconds = float(os.environ.get('FAKE_REDIS_LOADING_SECONDS', '0'))
+
+    def info(self):
+        uptime = int(time.time() - self.started)
+        lines = [
+            "# Server", "redis_version:7.2.0-fake", f"process_id:{os.getpid()}",
+            f"tcp_port:{self.config.get('port', 0)}", f"uptime_in_seconds:{uptime}",
+            "# Clients", f"connected_clients:{self.connected_clients}",
+            "# Memory", "used_memory:1048576",
+            "# Persistence", "loading:0", f"rdb_last_save_time:{self.last_save}",
+            "rdb_bgsave_in_progress:0", "rdb_last_bgsave_status:ok",
+            "# Stats", f"total_commands_processed:{self.commands_processed}",
+            "instantaneous_ops_per_sec:0", "keyspace_hits:0", "keyspace_misses:0",
+            "evicted_keys:0", "expired_keys:0",
+            "# Commandstats",
+            *(f"cmdstat_{name}:calls={calls},usec=0,usec_per_call=0.00,rejected_calls=0,failed_calls=0"
+              for name, calls in sorted(self.command_calls.items())),
+        ]
+        return "\r\n".join(lines) + "\r\n"
+
+    def save(self):
+        temp_path = self.rdb_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump({k.hex(): v.hex() for k, v in self.data.items()}, f)
+        os.replace(temp_path, self.rdb_path)
+        self.last_save = int(time.time())
+
+    def hello(self, args, session):
+        protocol = int(args[1]) if len(args) > 1 else 2
+        if protocol not in (2, 3):
+            return Exception("NOPROTO unsupported protocol version")
+        options = [arg.decode() for arg in args[2:]]
+        if options and options[0].upper() == 'AUTH':
+            if self.password is None or options[2] != self.password:
+                return Exception("WRONGPASS invalid username-password pair or user is disabled.")
+            session['authenticated'] = True
+        elif self.password is not None and not session.get('authenticated'):
+            return Exception("NOAUTH HELLO must be called with the client already authenticated")
+        session['protocol'] = protocol
+        fields = {'server': 'redis', 'version': '7.2.0', 'proto': protocol, 'id': 1, 'mode': 'standalone',
+                  'role': 'master', 'modules': []}
+        return Map(fields) if protocol == 3 else [item for pair in fields.items() for item in pair]
+
+    def execute(self, args, session):
+        command = args[0].decode().upper()
+        self.commands_processed += 1
+        self.command_calls[command.lower()] += 1
+
+        if command == 'HELLO':
+            return self.hello(args, session)
+        if command == 'AUTH':
+            if self.password is None:
+                return Exception("ERR AUTH <password> called without any password configured")
+            if args[-1].decode() != self.password:
+                return Exception("WRONGPASS invalid username-password pair or user is disabled.")
+            session['authenticated'] = True
+            return True
+        if self.password is not None and not session.get('authenticated'):
+            return Exception("NOAUTH Authentication required.")
+
+        if time.time() - self.started < self.loading_seconds:
+            return Exception("LOADING Redis is loading the dataset in memory")
+        if command == 'PING':
+            return b"PONG" if len(args) == 1 else args[1]
+        if command == 'INFO':
+            return self.info()
+        if command in ('CLIENT', 'SELECT', 'CONFIG'):
+            if command == 'CONFIG' and len(args) > 1 and args[1].decode().upper() == 'GET':
+                return []
+            return True
+        if command == 'BGSAVE':
+            self.save()
+            return "Background saving started"
+        if command == 'LASTSAVE':
+            return self.last_save
+        if command == 'SET' and len(args) == 3:
+            self.data[args[1]] = args[2]
+            return True
+        if command == 'GET' and len(args) == 2:
+            return self.data.get(args[1])
+        if command == 'SHUTDOWN':
+            sys.exit(0)
+        return Exception(f"ERR unknown command '{command.lower()}'")
+
+
+async def read_command(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b'*'):
+        return line.strip().split()
+    args = []
+    for _ in range(int(line[1:])):
+        header = await reader.readline()
+        length = int(header[1:])
+        data = await reader.readexactly(length + 2)
+        args.append(data[:-2])
+    return args
+
+
+async def main(config_path):
+    server_state = FakeRedis(parse_config(config_path))
+
+    async def handle(reader, writer):
+        session = {}
+        server_state.connected_clients += 1
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                if not args:
+                    continue
+                writer.write(encode(server_state.execute(args, session), session.get('protocol', 2)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            server_state.connected_clients -= 1
+            writer.close()
+
+    # Like redis-server, port 0 disables TCP and unixsocket adds a socket listener
+    servers = []
+    port = int(server_state.config.get('port', 0))
+    if port:
+        servers.append(await asyncio.start_server(handle, '127.0.0.1', port))
+    socket_path = server_state.config.get('unixsocket')
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        servers.append(await asyncio.start_unix_server(handle, socket_path))
+        os.chmod(socket_path, int(server_state.config.get('unixsocketperm', '700'), 8))
+    if not servers:
+        sys.exit("fake_redis_server.py: neither port nor unixsocket configured")
+
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stopped.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    try:
+        await stopped.wait()
+    except asyncio.CancelledError:
+        pass
+    for server in servers:
+        server.close()
+    if socket_path and os.path.exists(socket_path):
+        os.unlink(socket_path)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 2:
+        sys.exit("usage: fake_redis_server.py <redis.conf>")
+    asyncio.run(main(sys.argv[1]))
@@ -0,0 +1,212 @@
+"""
+Scaling benchmark for the Redis manager.
+
+Drives create/start/stop/list/status/sync through RedisService against the
+fake redis-server stand-in at several fleet sizes and reports throughput and
+p50/p99 latency per operation. Results are written as JSON so a later run can
+be compared against a saved baseline:
+
+    python bench/run.py --sizes 10,100 --output bench/results/baseline.json
+    python bench/run.py --sizes 10,100 --compare bench/results/baseline.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'src'))
+
+from infra.database import Database
+from infra.repository import RedisRepository, ProcessRepository
+from domain.process.service import ProcessManager
+from domain.redis.port import PortAllocator
+from domain.redis.service import RedisService
+from domain.redis.sync import FilesystemSync
+
+FAKE_SERVER = os.path.join(BENCH_DIR, 'fake_redis_server.py')
+DEFAULT_SIZES = '10,100,1000,5000'
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+
+    def time(self, operation, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.samples.setdefault(operation, []).append(time.perf_counter() - started)
+
+    def summary(self):
+        result = {}
+        for operation, samples in self.samples.items():
+            total = sum(samples)
+            result[operation] = {
+                'count': len(samples),
+                'total_s': round(total, 6),
+                'throughput_ops': round(len(samples) / total, 3) if total else None,
+                'p50_ms': round(percentile(samples, 0.5) * 1000, 3),
+                'p99_ms': round(percentile(samples, 0.99) * 1000, 3)
+            }
+        return result
+
+
+def fake_server_command(workdir):
+    """
+    The fallback process scan matches redis-server by name, so run the stand-in
+    under a redis-server alias where symlinks are available
+    """
+    alias = os.path.join(workdir, 'redis-server')
+    try:
+        os.symlink(sys.executable, alias)
+        return [alias, FAKE_SERVER]
+    except (OSError, NotImplementedError):
+        ProcessManager.PROCESS_NAMES += (os.path.basename(sys.executable),)
+        return [sys.executable, FAKE_SERVER]
+
+
+def run_size(size, args):
+    workdir = tempfile.mkdtemp(prefix=f'nanu-bench-{size}-')
+    base_path = os.path.join(workdir, 'instances')
+    database = Database(os.path.join(workdir, 'bench.db'))
+    repository = RedisRepository(database)
+    process_repository = ProcessRepository(database)
+    allocator = PortAllocator(repository, args.min_port, args.min_port + size + 100)
+    service = RedisService(
+        repository,
+        process_repository,
+        port_allocator=allocator,
+        base_path=base_path,
+        redis_command=fake_server_command(workdir)
+    )
+
+    recorder = Recorder()
+    redis_ids = [f'bench-{index:05d}' for index in range(size)]
+    running = redis_ids[:min(size, args.max_running)]
+    started = []
+    rng = random.Random(size)
+    try:
+        for redis_id in redis_ids:
+            recorder.time('create', service.create_instance, redis_id)
+
+        for redis_id in running:
+            recorder.time('start', service.start_instance, redis_id)
+            started.append(redis_id)
+
+        repository.invalidate_cache()
+        recorder.time('list_cold', service.get_all_instances)
+        for _ in range(args.repeat):
+            recorder.time('list', service.get_all_instances)
+
+        sample = rng.sample(redis_ids, min(size, args.status_samples))
+        for redis_id in sample:
+            recorder.time('status', service.get_instance_status, redis_id)
+        for _ in range(args.repeat):
+            recorder.time('fleet_status', service.get_fleet_status)
+
+        service.filesystem_sync = FilesystemSync(repository, allocator, base_path)
+        recorder.time('sync_cold', service.sync_with_filesystem)
+        for _ in range(args.repeat):
+            recorder.time('sync', service.sync_with_filesystem)
+
+        for redis_id in list(started):
+            recorder.time('stop', service.stop_instance, redis_id)
+            started.remove(redis_id)
+    finally:
+        for redis_id in started:
+            try:
+                service.stop_instance(redis_id)
+            except Exception:
+                pass
+        database.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return recorder.summary()
+
+
+def compare(baseline, current, threshold, noise_floor_ms):
+    """Print per-operation p50/p99 ratios and return the list of regressions"""
+    regressions = []
+    print(f"{'size':>6} {'operation':<14} {'p50 base':>10} {'p50 now':>10} {'p99 base':>10} {'p99 now':>10}")
+    for size, operations in current['results'].items():
+        base_operations = baseline.get('results', {}).get(size, {})
+        for operation, now in operations.items():
+            base = base_operations.get(operation)
+            if not base:
+                continue
+            flag = ''
+            for key in ('p50_ms', 'p99_ms'):
+                if now[key] > base[key] * (1 + threshold) and now[key] - base[key] > noise_floor_ms:
+                    flag = '  REGRESSION'
+                    regressions.append((size, operation, key, base[key], now[key]))
+            print(f"{size:>6} {operation:<14} {base['p50_ms']:>10.3f} {now['p50_ms']:>10.3f} "
+                  f"{base['p99_ms']:>10.3f} {now['p99_ms']:>10.3f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='comma separated fleet sizes')
+    parser.add_argument('--max-running', type=int, default=100,
+                        help='instances actually started per size, each one is a real process')
+    parser.add_argument('--status-samples', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20, help='iterations for list, fleet status and sync')
+    parser.add_argument('--min-port', type=int, default=20000)
+    parser.add_argument('--output', help='write results as JSON to this path')
+    parser.add_argument('--compare', help='baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative slowdown')
+    parser.add_argument('--noise-floor-ms', type=float, default=0.5, help='ignore slowdowns below this')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    results = {}
+    for size in sizes:
+        print(f"Running benchmark with {size} instances...", file=sys.stderr)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            results[str(size)] = run_size(size, args)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'max_running': args.max_running,
+            'repeat': args.repeat
+        },
+        'results': results
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold, args.noise_floor_ms)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
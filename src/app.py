@@ -1,30 +1,115 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from infra.database import Database
 from flask_cors import CORS
-from infra.repository import RedisRepository
+from infra.repository import LISTABLE_COLUMNS, BackupRepository, RedisRepository, ProcessRepository
+from infra.agent_client import AgentClient
 from domain.redis.service import RedisService
+from domain.redis.domain import InstanceFilter, RedisStatus
+from domain.redis.profile import PROFILES
 from domain.process.service import ProcessManager
-from threading import Thread
+from domain.process.supervisor import ProcessSupervisor
+from domain.process.affinity import CpuPlacer
+from domain.redis.startup import ResourceGate
+from domain.redis.port import PortAllocator
+from domain.redis.client import RedisClientPool
+from domain.redis.monitor import HealthMonitor
+from domain.redis.hibernation import HibernationManager
+from domain.job.domain import Job, JobStatus
+from domain.job.service import JobManager
+from domain.metrics.service import MetricsCollector
+from domain.metrics.timing import timings
+from domain.agent.service import AgentService
+from domain.backup.domain import BackupStatus
+from domain.backup.service import BackupService
+from threading import Thread, Timer
+from typing import Dict
+import base64
+import itertools
+import json
+import os
+import queue
+import socket
+import time
 import psutil
 from datetime import datetime
 
 app = Flask(__name__)
 CORS(app)
 
-database = Database()
+# Several agents can share one host with their own database, base path and port range
+AGENT_PORT = int(os.environ.get('NANU_AGENT_PORT', 14911))
+AGENT_ID = os.environ.get('NANU_AGENT_ID', f"{socket.gethostname()}:{AGENT_PORT}")
+AGENT_URL = os.environ.get('NANU_AGENT_URL', f"http://{socket.gethostname()}:{AGENT_PORT}")
+CONTROLLER_URL = os.environ.get('NANU_CONTROLLER_URL')
+PORT_MIN = int(os.environ.get('NANU_PORT_MIN', 5000))
+PORT_MAX = int(os.environ.get('NANU_PORT_MAX', 9999))
+# round_robin or least_loaded pins every redis-server to cores, unset leaves scheduling to the OS
+CPU_PINNING = os.environ.get('NANU_CPU_PINNING')
+DEDICATED_CORES = int(os.environ.get('NANU_DEDICATED_CORES', 0))
+# Seconds without tenant commands before an instance is hibernated, unset disables hibernation
+HIBERNATE_AFTER = os.environ.get('NANU_HIBERNATE_AFTER')
+# Backup archives default to a dot directory the filesystem sync skips,
+# the rate limit in bytes per second is shared by all backups, restores and downloads
+BACKUP_PATH = os.environ.get('NANU_BACKUP_PATH')
+BACKUP_RATE_LIMIT = int(os.environ.get('NANU_BACKUP_RATE_LIMIT', 32 * 1024 * 1024))
+BACKUP_CONCURRENCY = int(os.environ.get('NANU_BACKUP_CONCURRENCY', 2))
+# Bytes per second the background removal of deleted instances may free
+TRASH_RATE_LIMIT = int(os.environ.get('NANU_TRASH_RATE_LIMIT', 64 * 1024 * 1024))
+
+database = Database(os.environ.get('NANU_DB_PATH', 'redis_manager.db'))
 repository = RedisRepository(database)
-redis_service = RedisService(repository)
+process_repository = ProcessRepository(database)
+port_allocator = PortAllocator(repository, min_port=PORT_MIN, max_port=PORT_MAX)
+client_pool = RedisClientPool()
+health_monitor = HealthMonitor(repository, client_pool, interval=5.0)
+supervisor = ProcessSupervisor(base_backoff=1.0, max_backoff=60.0, crash_loop_limit=5, crash_loop_window=300.0)
+cpu_placer = CpuPlacer(CPU_PINNING, dedicated_cores=DEDICATED_CORES) if CPU_PINNING else None
+redis_service = RedisService(repository, process_repository, port_allocator=port_allocator,
+                             health_monitor=health_monitor, client_pool=client_pool, supervisor=supervisor,
+                             cpu_placer=cpu_placer, trash_rate_limit=TRASH_RATE_LIMIT)
+hibernation_manager = HibernationManager(redis_service, client_pool, idle_seconds=float(HIBERNATE_AFTER)) \
+    if HIBERNATE_AFTER else None
+redis_service.hibernation = hibernation_manager
+job_manager = JobManager(max_workers=4)
+metrics_collector = MetricsCollector(repository, client_pool, cache_seconds=10.0)
+agent_service = AgentService(redis_service, port_allocator, agent_id=AGENT_ID)
+backup_service = BackupService(redis_service, BackupRepository(database),
+                               BACKUP_PATH or f"{redis_service.base_path}/.backups",
+                               rate_limit=BACKUP_RATE_LIMIT, max_concurrent=BACKUP_CONCURRENCY)
+
+SLOW_OPERATION_MS = 1000
+timings.slow_threshold_ms = SLOW_OPERATION_MS
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    started = g.pop('request_started', None)
+    if started is not None and request.url_rule is not None:
+        timings.observe(f"http.{request.method} {request.url_rule.rule}", (time.perf_counter() - started) * 1000)
+    return response
 
 @app.route('/api/redis', methods=['POST'])
 def create_redis():
     data = request.get_json()
     redis_id = data.get('redis_id')
+    profile = data.get('profile', 'default')
+    overrides = data.get('config')
+    tier = data.get('tier', 'standard')
     
     if not redis_id:
         return jsonify({'error': 'redis_id is required'}), 400
+    if overrides is not None and not isinstance(overrides, dict):
+        return jsonify({'error': 'config must be an object'}), 400
+    try:
+        transport = _parse_transport(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     try:
-        instance = redis_service.create_instance(redis_id)
+        instance = redis_service.create_instance(redis_id, profile, overrides, tier=tier, **transport)
         print(instance)
         return jsonify({
             'id': instance.id,
@@ -34,64 +119,463 @@ def create_redis():
             'status': instance.status.value,
             'service_status': instance.service_status,
             'created_at': instance.created_at.isoformat(),
+            'profile': instance.profile,
+            'unix_socket': instance.unix_socket,
+            'tier': instance.tier,
             'redis_password': instance.password
         }), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _parse_transport(data: Dict) -> Dict:
+    """unix_socket/unix_socket_perm/tcp options of create requests"""
+    unix_socket = data.get('unix_socket', False)
+    tcp = data.get('tcp', True)
+    unix_socket_perm = data.get('unix_socket_perm', '700')
+    if not isinstance(unix_socket, bool) or not isinstance(tcp, bool):
+        raise ValueError('unix_socket and tcp must be booleans')
+    if not isinstance(unix_socket_perm, str):
+        raise ValueError('unix_socket_perm must be an octal string like "770"')
+    return {'unix_socket': unix_socket, 'tcp': tcp, 'unix_socket_perm': unix_socket_perm}
+
+def _wants_wait() -> bool:
+    return request.args.get('wait', 'false').lower() in ('1', 'true', 'yes')
+
+def _job_response(job: Job, sync_status: int = 200):
+    """202 with the job for async calls, or the finished result with ?wait=true"""
+    if not _wants_wait():
+        response = jsonify(job.to_dict())
+        response.headers['Location'] = f"/api/jobs/{job.id}"
+        return response, 202
+
+    job.wait()
+    if job.status == JobStatus.FAILED:
+        if isinstance(job.exception, ValueError):
+            return jsonify({'error': job.error}), 404
+        return jsonify({'error': job.error}), 500
+    if job.result is None:
+        return '', sync_status
+    return jsonify(job.result), sync_status
+
+def _start_job(job: Job) -> Dict:
+    instance = redis_service.start_instance(job.redis_id)
+    return {
+        'id': instance.id,
+        'port': instance.port,
+        'unix_socket': instance.unix_socket,
+        'status': instance.status.value,
+        'service_status': instance.service_status,
+        'startup_seconds': redis_service.startup_times.get(instance.id)
+    }
+
+def _stop_job(job: Job) -> Dict:
+    instance = redis_service.stop_instance(job.redis_id)
+    return {
+        'id': instance.id,
+        'port': instance.port,
+        'status': instance.status.value,
+        'service_status': instance.service_status
+    }
+
+def _hibernate_job(job: Job) -> Dict:
+    if not hibernation_manager.hibernate(job.redis_id):
+        raise RuntimeError(f"Redis instance {job.redis_id} is not running or could not be hibernated")
+    return {
+        'id': job.redis_id,
+        'status': RedisStatus.HIBERNATING.value,
+        'hibernation': hibernation_manager.status(job.redis_id)
+    }
+
+def _delete_job(job: Job) -> None:
+    redis_service.delete_instance(job.redis_id)
+    return None
+
 @app.route('/api/redis/<redis_id>', methods=['DELETE'])
 def delete_redis(redis_id):
+    if not repository.exists(redis_id):
+        return jsonify({'error': f"Redis instance {redis_id} not found"}), 404
     try:
-        redis_service.delete_instance(redis_id)
-        return '', 204
-    except ValueError as e:
-        return jsonify({'error': str(e)}), 404
+        job = job_manager.submit('delete', redis_id, _delete_job)
+        return _job_response(job, sync_status=204)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/redis/<redis_id>/start', methods=['POST'])
 def start_redis(redis_id):
+    if not repository.exists(redis_id):
+        return jsonify({'error': f"Redis instance {redis_id} not found"}), 404
     try:
-        instance = redis_service.start_instance(redis_id)
-        return jsonify({
+        job = job_manager.submit('start', redis_id, _start_job)
+        return _job_response(job)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/redis/<redis_id>/stop', methods=['POST'])
+def stop_redis(redis_id):
+    if not repository.exists(redis_id):
+        return jsonify({'error': f"Redis instance {redis_id} not found"}), 404
+    try:
+        job = job_manager.submit('stop', redis_id, _stop_job)
+        return _job_response(job)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/redis/<redis_id>/hibernate', methods=['POST'])
+def hibernate_redis(redis_id):
+    if hibernation_manager is None:
+        return jsonify({'error': 'Hibernation is disabled, set NANU_HIBERNATE_AFTER'}), 400
+    if not repository.exists(redis_id):
+        return jsonify({'error': f"Redis instance {redis_id} not found"}), 404
+    try:
+        job = job_manager.submit('hibernate', redis_id, _hibernate_job)
+        return _job_response(job)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/hibernation', methods=['GET'])
+def get_hibernation_stats():
+    if hibernation_manager is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **hibernation_manager.stats()})
+
+@app.route('/api/redis/<redis_id>/backups', methods=['POST'])
+def create_backup(redis_id):
+    try:
+        backup = backup_service.create_backup(redis_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    if not _wants_wait():
+        response = jsonify(backup.to_dict())
+        response.headers['Location'] = f"/api/backups/{backup.id}"
+        return response, 202
+    backup = backup_service.wait(backup.id)
+    return jsonify(backup.to_dict()), 201 if backup.status == BackupStatus.SUCCEEDED else 500
+
+@app.route('/api/redis/<redis_id>/backups', methods=['GET'])
+def list_redis_backups(redis_id):
+    return jsonify([backup.to_dict() for backup in backup_service.list_backups(redis_id)])
+
+@app.route('/api/backups', methods=['GET'])
+def list_backups():
+    return jsonify({
+        **backup_service.stats(),
+        'backups': [backup.to_dict() for backup in backup_service.list_backups()]
+    })
+
+@app.route('/api/backups/<backup_id>', methods=['GET'])
+def get_backup(backup_id):
+    try:
+        return jsonify(backup_service.get_backup(backup_id).to_dict())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+
+@app.route('/api/backups/<backup_id>', methods=['DELETE'])
+def delete_backup(backup_id):
+    try:
+        backup_service.delete_backup(backup_id)
+        return '', 204
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+
+@app.route('/api/backups/<backup_id>/archive', methods=['GET'])
+def download_backup(backup_id):
+    try:
+        backup, size = backup_service.archive_info(backup_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    return Response(backup_service.read_archive(backup_id), mimetype='application/gzip', headers={
+        'Content-Length': str(size),
+        'Content-Disposition': f'attachment; filename="{backup.redis_id}-{backup.id}.tar.gz"'
+    })
+
+def _restore_job(backup_id: str, options: Dict):
+    def run(job: Job) -> Dict:
+        instance = backup_service.restore_backup(backup_id, job.redis_id, **options)
+        return {
             'id': instance.id,
             'port': instance.port,
+            'unix_socket': instance.unix_socket,
+            'data_dir': instance.data_dir,
             'status': instance.status.value,
-            'service_status': instance.service_status
-        })
+            'service_status': instance.service_status,
+            'profile': instance.profile,
+            'tier': instance.tier,
+            'redis_password': instance.password,
+            'backup_id': backup_id
+        }
+    return run
+
+@app.route('/api/backups/<backup_id>/restore', methods=['POST'])
+def restore_backup(backup_id):
+    """Restore into a new instance, the source instance is left untouched"""
+    data = request.get_json() or {}
+    redis_id = data.get('redis_id')
+    overrides = data.get('config')
+    if not redis_id:
+        return jsonify({'error': 'redis_id is required'}), 400
+    if overrides is not None and not isinstance(overrides, dict):
+        return jsonify({'error': 'config must be an object'}), 400
+    if repository.exists(redis_id):
+        return jsonify({'error': f"Redis instance {redis_id} already exists"}), 409
+    try:
+        transport = _parse_transport(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        backup_service.archive_info(backup_id)
     except ValueError as e:
         return jsonify({'error': str(e)}), 404
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+    options = {'profile': data.get('profile'), 'overrides': overrides, 'tier': data.get('tier'),
+               'start': bool(data.get('start', False)), **transport}
+    try:
+        job = job_manager.submit('restore', redis_id, _restore_job(backup_id, options))
+        return _job_response(job, sync_status=201)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/redis/<redis_id>/stop', methods=['POST'])
-def stop_redis(redis_id):
+BATCH_ACTIONS = {
+    'start': _start_job,
+    'stop': _stop_job,
+    'delete': _delete_job
+}
+
+@app.route('/api/redis/batch', methods=['POST'])
+def batch_redis():
+    data = request.get_json() or {}
+    action = data.get('action')
+    redis_ids = data.get('redis_ids')
+
+    if action not in ('create', *BATCH_ACTIONS):
+        return jsonify({'error': 'action must be one of create, start, stop, delete'}), 400
+    if not isinstance(redis_ids, list) or not redis_ids:
+        return jsonify({'error': 'redis_ids must be a non-empty list'}), 400
+    if data.get('config') is not None and not isinstance(data.get('config'), dict):
+        return jsonify({'error': 'config must be an object'}), 400
+
     try:
-        instance = redis_service.stop_instance(redis_id)
+        if action == 'create':
+            results = []
+            for result in redis_service.create_instances(redis_ids, profile=data.get('profile', 'default'),
+                                                         overrides=data.get('config'), tier=data.get('tier', 'standard'),
+                                                         **_parse_transport(data)):
+                if result.ok:
+                    instance = result.instance
+                    results.append({
+                        'id': instance.id,
+                        'ok': True,
+                        'port': instance.port,
+                        'config_path': instance.config_path,
+                        'data_dir': instance.data_dir,
+                        'status': instance.status.value,
+                        'service_status': instance.service_status,
+                        'created_at': instance.created_at.isoformat(),
+                        'profile': instance.profile,
+                        'unix_socket': instance.unix_socket,
+                        'tier': instance.tier,
+                        'redis_password': instance.password
+                    })
+                else:
+                    results.append({'id': result.redis_id, 'ok': False, 'error': result.error})
+        else:
+            # Runs on the job executor, which bounds parallelism and serializes per instance
+            jobs = []
+            for redis_id in dict.fromkeys(redis_ids):
+                if repository.exists(redis_id):
+                    jobs.append((redis_id, job_manager.submit(action, redis_id, BATCH_ACTIONS[action])))
+                else:
+                    jobs.append((redis_id, None))
+
+            results = []
+            for redis_id, job in jobs:
+                if job is None:
+                    results.append({'id': redis_id, 'ok': False, 'error': f"Redis instance {redis_id} not found"})
+                    continue
+                job.wait()
+                item = {'id': redis_id, 'ok': job.status == JobStatus.SUCCEEDED, 'job_id': job.id}
+                if job.result:
+                    item.update(job.result)
+                if job.error:
+                    item['error'] = job.error
+                results.append(item)
+
         return jsonify({
-            'id': instance.id,
-            'port': instance.port,
-            'status': instance.status.value,
-            'service_status': instance.service_status
+            'action': action,
+            'succeeded': sum(1 for item in results if item['ok']),
+            'failed': sum(1 for item in results if not item['ok']),
+            'results': results
         })
     except ValueError as e:
-        return jsonify({'error': str(e)}), 404
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_manager.get(job_id)
+    if not job:
+        return jsonify({'error': f"Job {job_id} not found"}), 404
+    return jsonify(job.to_dict())
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+DEFAULT_LIST_FIELDS = ('id', 'port', 'status', 'service_status', 'config_path', 'data_dir', 'created_at')
+
+def _encode_cursor(redis_id: str) -> str:
+    return base64.urlsafe_b64encode(redis_id.encode()).decode()
+
+def _decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value) if value else None
+
+def _parse_int(name: str):
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer")
+
+def _parse_list_args():
+    status = request.args.get('status')
+    try:
+        filters = InstanceFilter(
+            status=RedisStatus(status) if status else None,
+            service_status=_parse_int('service_status'),
+            port_min=_parse_int('port_min'),
+            port_max=_parse_int('port_max'),
+            created_after=_parse_datetime(request.args.get('created_after')),
+            created_before=_parse_datetime(request.args.get('created_before'))
+        )
+    except ValueError as e:
+        raise ValueError(f"Invalid filter: {e}")
+
+    fields_arg = request.args.get('fields')
+    fields = [field.strip() for field in fields_arg.split(',') if field.strip()] if fields_arg else list(DEFAULT_LIST_FIELDS)
+    unknown = [field for field in fields if field not in LISTABLE_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    cursor = request.args.get('cursor')
+    paginated = cursor is not None or 'limit' in request.args
+    limit = _parse_int('limit')
+    if limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    after_id = _decode_cursor(cursor) if cursor else None
+    return filters, fields, after_id, (limit if paginated else None)
+
 @app.route('/api/redis', methods=['GET'])
 def list_redis():
+    """
+    Streams instances as they are encoded. Without limit/cursor the response is the
+    plain array as before, with them it is a page: {"items": [...], "next_cursor": ...}.
+    Filters: status, service_status, port_min, port_max, created_after, created_before.
+    fields= projects a subset of the columns.
+    A failure after streaming began ends the array with an {"error": ...} item,
+    or adds "error" to the page object.
+    """
     try:
-        instances = redis_service.get_all_instances()
-        return jsonify([{
-            'id': instance.id,
-            'port': instance.port,
-            'status': instance.status.value,
-            'service_status': instance.service_status,
-            'config_path': instance.config_path,
-            'data_dir': instance.data_dir,
-            'created_at': instance.created_at.isoformat()
-        } for instance in instances])
+        filters, fields, after_id, limit = _parse_list_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        # Fetch one extra row to learn whether another page follows
+        rows = redis_service.iter_instances(filters, fields, after_id, limit + 1 if limit else None)
+        # Pull the first row here, so bad fields and query errors get a real status
+        # instead of surfacing after a 200 has been sent
+        first = next(rows, None)
+        rows = itertools.chain([first], rows) if first is not None else iter(())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    def generate_array():
+        yield '['
+        count = 0
+        try:
+            for _, item in rows:
+                yield (',' if count else '') + json.dumps(item)
+                count += 1
+        except Exception as e:
+            # Too late for an error status, end the array with an error item instead of cutting it off
+            print(f"Error streaming Redis instances: {e}")
+            yield (',' if count else '') + json.dumps({'error': str(e)})
+        yield ']'
+
+    def generate_page():
+        yield '{"items":['
+        count = 0
+        last_id = None
+        has_more = False
+        error = None
+        try:
+            for redis_id, item in rows:
+                if count == limit:
+                    has_more = True
+                    break
+                yield (',' if count else '') + json.dumps(item)
+                count += 1
+                last_id = redis_id
+        except Exception as e:
+            print(f"Error streaming Redis instances: {e}")
+            error = str(e)
+        next_cursor = _encode_cursor(last_id) if has_more else None
+        yield '],"next_cursor":' + json.dumps(next_cursor) + (',"error":' + json.dumps(error) if error else '') + '}'
+
+    body = generate_page() if limit else generate_array()
+    return Response(stream_with_context(body), mimetype='application/json')
+
+@app.route('/api/profiles', methods=['GET'])
+def list_profiles():
+    return jsonify(PROFILES)
+
+@app.route('/api/redis/<redis_id>/config', methods=['GET'])
+def get_redis_config(redis_id):
+    try:
+        return jsonify(redis_service.get_config(redis_id))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/redis/<redis_id>/config', methods=['PATCH'])
+def update_redis_config(redis_id):
+    data = request.get_json() or {}
+    settings = data.get('settings')
+    if not isinstance(settings, dict):
+        return jsonify({'error': 'settings must be an object'}), 400
+    if not repository.exists(redis_id):
+        return jsonify({'error': f"Redis instance {redis_id} not found"}), 404
+    try:
+        return jsonify(redis_service.update_config(redis_id, settings))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/redis/status', methods=['GET'])
+def get_fleet_status():
+    try:
+        return jsonify(redis_service.get_fleet_status())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -105,12 +589,110 @@ def get_redis_status(redis_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+STARTUP_CONCURRENCY = int(os.environ.get('NANU_STARTUP_CONCURRENCY', 8))
+STARTUP_ORDER = os.environ.get('NANU_STARTUP_ORDER', 'data_size') or None
+# Launches pause while available memory is below this or disk I/O is above this, 0 disables the I/O check
+STARTUP_MIN_MEMORY_MB = int(os.environ.get('NANU_STARTUP_MIN_MEMORY_MB', 512))
+STARTUP_MAX_DISK_IO_MB = float(os.environ.get('NANU_STARTUP_MAX_DISK_IO_MB', 200))
+# id=priority pairs, higher starts first and ahead of the data size order
+STARTUP_PRIORITIES = {
+    redis_id.strip(): int(priority)
+    for redis_id, _, priority in (entry.partition('=') for entry in
+                                  filter(None, os.environ.get('NANU_STARTUP_PRIORITIES', '').split(',')))
+}
+FILESYSTEM_SYNC_INTERVAL = 30.0
+
+startup_report = None
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    try:
+        return Response(metrics_collector.render(), mimetype='text/plain; version=0.0.4')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/internal/stats', methods=['GET'])
+def get_internal_stats():
+    return jsonify({
+        'timings': timings.snapshot(),
+        'slow_operations': timings.slow_operations(),
+        'slow_threshold_ms': timings.slow_threshold_ms,
+        'repository_cache': repository.cache_stats(),
+        'available_ports': port_allocator.available(),
+        'cpu_placement': cpu_placer.snapshot() if cpu_placer else None,
+        'backups': backup_service.stats(),
+        'trash': redis_service.trash.stats()
+    })
+
+@app.route('/api/events', methods=['GET'])
+def stream_events():
+    """Server-Sent Events stream of instance status changes"""
+    subscription = health_monitor.subscribe()
+
+    def generate():
+        try:
+            for state in health_monitor.get_states():
+                yield f"event: snapshot\ndata: {json.dumps(state.to_dict())}\n\n"
+            while True:
+                try:
+                    event = subscription.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: status\ndata: {json.dumps(event)}\n\n"
+        finally:
+            health_monitor.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
 def start_instances_in_background():
-    redis_service.start_all_instances()
+    global startup_report
+    startup_report = redis_service.start_all_instances(
+        max_workers=STARTUP_CONCURRENCY,
+        order=STARTUP_ORDER,
+        priorities=STARTUP_PRIORITIES,
+        resource_gate=ResourceGate(min_available_memory_mb=STARTUP_MIN_MEMORY_MB,
+                                   max_disk_io_mb_per_sec=STARTUP_MAX_DISK_IO_MB or None)
+    )
+    print(f"Started {len(startup_report.started)} Redis instances in {startup_report.elapsed:.1f}s, "
+          f"{len(startup_report.failed)} failed")
+
+@app.route('/api/agent/capacity', methods=['GET'])
+def get_agent_capacity():
+    try:
+        return jsonify(agent_service.capacity())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def register_with_controller():
+    try:
+        status, body, _ = AgentClient(CONTROLLER_URL).request('POST', '/api/agents', {'id': AGENT_ID, 'url': AGENT_URL})
+        if status >= 300:
+            print(f"Controller rejected agent registration: {body.decode(errors='replace')}")
+    except RuntimeError as e:
+        print(f"Error registering with controller: {e}")
+
+@app.route('/api/startup-report', methods=['GET'])
+def get_startup_report():
+    if startup_report is None:
+        return jsonify({'error': 'Startup still in progress'}), 404
+    return jsonify(startup_report.to_dict())
 
 if __name__ == '__main__':
+    backup_service.recover()
+    # Picks up whatever deletions were still being reclaimed when the agent stopped
+    redis_service.trash.start()
+    if hibernation_manager:
+        # Sleeping instances get their listeners back instead of being started
+        hibernation_manager.restore()
+        hibernation_manager.start()
     thread = Thread(target=start_instances_in_background)
     thread.start()
 
     redis_service.sync_with_filesystem()
-    app.run(host='0.0.0.0', port=14911)
+    redis_service.filesystem_sync.start(interval=FILESYSTEM_SYNC_INTERVAL)
+    health_monitor.start()
+    if CONTROLLER_URL:
+        # Delayed so the controller's first capacity poll finds the API up
+        Timer(1.0, register_with_controller).start()
+    app.run(host='0.0.0.0', port=AGENT_PORT)
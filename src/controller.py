@@ -0,0 +1,165 @@
+from flask import Flask, Response, jsonify, request
+from flask_cors import CORS
+from infra.database import Database
+from infra.repository import ClusterRepository
+from infra.agent_client import AgentClient
+from domain.cluster.service import ClusterService
+from domain.metrics.timing import timings
+import os
+
+# Controller in front of per-host agents (app.py), agents listed in NANU_AGENTS
+# as id=url pairs are registered at startup, others register themselves
+CONTROLLER_PORT = int(os.environ.get('NANU_CONTROLLER_PORT', 14900))
+AGENT_POLL_INTERVAL = 10.0
+AGENT_STALE_AFTER = 30.0
+
+app = Flask(__name__)
+CORS(app)
+
+database = Database(os.environ.get('NANU_CONTROLLER_DB_PATH', 'redis_controller.db'))
+cluster_repository = ClusterRepository(database)
+cluster_service = ClusterService(cluster_repository, AgentClient, poll_interval=AGENT_POLL_INTERVAL,
+                                 stale_after=AGENT_STALE_AFTER)
+
+def _agent_response(status: int, body: bytes, content_type: str):
+    return Response(body, status=status, content_type=content_type)
+
+def _forward(redis_id: str, method: str, path: str):
+    try:
+        agent = cluster_service.agent_for(redis_id)
+        status, body, content_type = cluster_service.forward(agent, method, path, request.args.to_dict(),
+                                                             request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 502
+    response = _agent_response(status, body, content_type)
+    job = response.get_json(silent=True) if status == 202 else None
+    if job:
+        # Jobs live on the agent, point the client at the controller's proxy for them
+        response.headers['Location'] = f"/api/agents/{agent.id}/jobs/{job['id']}"
+    return response
+
+@app.route('/api/agents', methods=['GET'])
+def list_agents():
+    return jsonify(cluster_service.get_agents())
+
+@app.route('/api/agents', methods=['POST'])
+def register_agent():
+    data = request.get_json() or {}
+    agent_id = data.get('id')
+    url = data.get('url')
+    if not agent_id or not url:
+        return jsonify({'error': 'id and url are required'}), 400
+    agent = cluster_service.register_agent(agent_id, url)
+    return jsonify(agent.to_dict(cluster_service.stale_after)), 201
+
+@app.route('/api/agents/<agent_id>', methods=['DELETE'])
+def remove_agent(agent_id):
+    try:
+        cluster_service.remove_agent(agent_id)
+        return '', 204
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 409
+
+@app.route('/api/agents/<agent_id>/jobs/<job_id>', methods=['GET'])
+def get_agent_job(agent_id, job_id):
+    try:
+        agent = cluster_service.get_agent(agent_id)
+        return _agent_response(*cluster_service.forward(agent, 'GET', f"/api/jobs/{job_id}"))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 502
+
+@app.route('/api/redis', methods=['POST'])
+def create_redis():
+    data = request.get_json() or {}
+    if not data.get('redis_id'):
+        return jsonify({'error': 'redis_id is required'}), 400
+    try:
+        status, result = cluster_service.create_instance(data['redis_id'], data)
+        return jsonify(result), status
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 503
+
+@app.route('/api/redis', methods=['GET'])
+def list_redis():
+    """Merged listing of all agents, filters and fields are passed through, pagination is per agent"""
+    query = request.args.to_dict()
+    if 'cursor' in query or 'limit' in query:
+        return jsonify({'error': 'Pagination is not supported across agents'}), 400
+    try:
+        return jsonify(cluster_service.list_instances(query))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 502
+
+@app.route('/api/redis/batch', methods=['POST'])
+def batch_redis():
+    """Same contract as the agent route, items are grouped per agent and tagged with it"""
+    data = request.get_json() or {}
+    action = data.get('action')
+    redis_ids = data.get('redis_ids')
+    if action not in ('create', 'start', 'stop', 'delete'):
+        return jsonify({'error': 'action must be one of create, start, stop, delete'}), 400
+    if not isinstance(redis_ids, list) or not redis_ids:
+        return jsonify({'error': 'redis_ids must be a non-empty list'}), 400
+    if data.get('config') is not None and not isinstance(data.get('config'), dict):
+        return jsonify({'error': 'config must be an object'}), 400
+    payload = {key: value for key, value in data.items() if key not in ('action', 'redis_ids')}
+    try:
+        return jsonify(cluster_service.batch(action, redis_ids, payload))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 502
+
+@app.route('/api/redis/status', methods=['GET'])
+def get_fleet_status():
+    try:
+        return jsonify(cluster_service.fleet_status())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 502
+
+@app.route('/api/redis/<redis_id>', methods=['DELETE'])
+def delete_redis(redis_id):
+    try:
+        return _agent_response(*cluster_service.delete_instance(redis_id, request.args.to_dict()))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except RuntimeError as e:
+        return jsonify({'error': str(e)}), 502
+
+@app.route('/api/redis/<redis_id>/start', methods=['POST'])
+def start_redis(redis_id):
+    return _forward(redis_id, 'POST', f"/api/redis/{redis_id}/start")
+
+@app.route('/api/redis/<redis_id>/stop', methods=['POST'])
+def stop_redis(redis_id):
+    return _forward(redis_id, 'POST', f"/api/redis/{redis_id}/stop")
+
+@app.route('/api/redis/<redis_id>/status', methods=['GET'])
+def get_redis_status(redis_id):
+    return _forward(redis_id, 'GET', f"/api/redis/{redis_id}/status")
+
+@app.route('/api/redis/<redis_id>/config', methods=['GET', 'PATCH'])
+def redis_config(redis_id):
+    return _forward(redis_id, request.method, f"/api/redis/{redis_id}/config")
+
+@app.route('/api/internal/stats', methods=['GET'])
+def get_internal_stats():
+    return jsonify({
+        'timings': timings.snapshot(),
+        'slow_operations': timings.slow_operations()
+    })
+
+if __name__ == '__main__':
+    for entry in filter(None, os.environ.get('NANU_AGENTS', '').split(',')):
+        agent_id, _, url = entry.partition('=')
+        cluster_service.register_agent(agent_id.strip(), url.strip())
+    cluster_service.refresh()
+    cluster_service.sync_placements()
+    cluster_service.start()
+    app.run(host='0.0.0.0', port=CONTROLLER_PORT)
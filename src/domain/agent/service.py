@@ -0,0 +1,65 @@
+import os
+import shutil
+import socket
+from datetime import datetime
+from typing import Dict, Optional
+import psutil
+from domain.process.service import ProcessManager
+from domain.redis.port import PortAllocator
+from domain.metrics.timing import timed
+
+class AgentService:
+    """
+    The per-host side of a multi-host deployment.
+    Wraps the local RedisService and reports the capacity the controller places by.
+    """
+    def __init__(self, redis_service, port_allocator: PortAllocator, agent_id: Optional[str] = None):
+        self.redis_service = redis_service
+        self.port_allocator = port_allocator
+        self.agent_id = agent_id or socket.gethostname()
+
+    @timed('agent.capacity')
+    def capacity(self) -> Dict:
+        memory = psutil.virtual_memory()
+        counts = self.redis_service.repository.count_instances()
+        own_ports = set(self.redis_service.repository.find_all_ports())
+
+        # One process table pass for everything redis-server on this host,
+        # other agents sharing the host count towards its load too
+        redis_rss = 0
+        running = 0
+        for port, proc in ProcessManager.snapshot_listeners().items():
+            rss = ProcessManager.get_usage(proc)['rss_bytes']
+            redis_rss += rss or 0
+            if port in own_ports:
+                running += 1
+
+        try:
+            load_average = list(os.getloadavg())
+        except (AttributeError, OSError):
+            load_average = None
+        try:
+            disk_free = shutil.disk_usage(self.redis_service.base_path).free
+        except OSError:
+            disk_free = None
+
+        return {
+            'agent_id': self.agent_id,
+            'hostname': socket.gethostname(),
+            'cpu_count': psutil.cpu_count() or 1,
+            'cpu_percent': psutil.cpu_percent(interval=None),
+            'load_average': load_average,
+            'memory_total': memory.total,
+            'memory_available': memory.available,
+            'redis_rss_bytes': redis_rss,
+            'disk_free_bytes': disk_free,
+            'instance_count': counts['total'],
+            'enabled_count': counts['enabled'],
+            'running_count': running,
+            'free_ports': self.port_allocator.available(),
+            'port_capacity': self.port_allocator.max_port - self.port_allocator.min_port + 1,
+            'port_range': [self.port_allocator.min_port, self.port_allocator.max_port],
+            # Space deleted instances still hold until the trash reclaimer gets to them
+            'trash_pending_bytes': self.redis_service.trash.stats()['pending_bytes'],
+            'reported_at': datetime.now().isoformat()
+        }
@@ -0,0 +1,48 @@
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Dict, List, Optional
+
+class BackupStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+@dataclass
+class Backup:
+    id: str
+    redis_id: str
+    path: str
+    created_at: datetime = field(default_factory=datetime.now)
+    status: BackupStatus = BackupStatus.PENDING
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # Bytes read from the data directory and size of the compressed archive
+    source_bytes: int = 0
+    size_bytes: int = 0
+    files: List[str] = field(default_factory=list)
+    # LASTSAVE of the snapshot, None when the files of a stopped instance were archived as they were
+    lastsave: Optional[int] = None
+    error: Optional[str] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False, compare=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (BackupStatus.SUCCEEDED, BackupStatus.FAILED)
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'redis_id': self.redis_id,
+            'status': self.status.value,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'source_bytes': self.source_bytes,
+            'size_bytes': self.size_bytes,
+            'files': self.files,
+            'lastsave': self.lastsave,
+            'error': self.error
+        }
@@ -0,0 +1,380 @@
+import io
+import json
+import os
+import tarfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import redis
+from domain.backup.domain import Backup, BackupStatus
+from domain.redis.domain import RedisInstance, RedisStatus
+from domain.redis.profile import read_settings
+from domain.metrics.timing import phase, timed
+from infra.throttle import RateLimiter
+
+MANIFEST_NAME = 'manifest.json'
+# BGSAVE refusals while another save or an AOF rewrite child is running
+SAVE_BUSY_ERRORS = ('in progress', "can't BGSAVE right now")
+DATA_PREFIX = 'data/'
+
+
+class _ThrottledFile:
+    """File wrapper that draws every read and write from the shared rate limiter"""
+    def __init__(self, fileobj, limiter: RateLimiter, chunk_size: int, limit: Optional[int] = None):
+        self._fileobj = fileobj
+        self._limiter = limiter
+        self._chunk_size = chunk_size
+        # Bytes left to read, files still being appended to are cut at the size taken up front
+        self._remaining = limit
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0 or size > self._chunk_size:
+            size = self._chunk_size
+        if self._remaining is not None:
+            size = min(size, self._remaining)
+        data = self._fileobj.read(size) if size else b''
+        self._limiter.consume(len(data))
+        self.bytes_read += len(data)
+        if self._remaining is not None:
+            self._remaining -= len(data)
+        return data
+
+    def write(self, data) -> int:
+        self._limiter.consume(len(data))
+        return self._fileobj.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._fileobj, name)
+
+
+class BackupService:
+    """
+    Consistent backups of instance data directories.
+    A running instance is snapshotted with BGSAVE first, then the RDB file (and the AOF
+    when appendonly is on) is streamed in chunks into a tar.gz archive. All reads and writes
+    share one rate limiter so backups do not starve neighbouring tenants of disk bandwidth,
+    and at most max_concurrent backups run at once across all instances.
+    """
+    def __init__(self, redis_service, repository, backup_path: str, rate_limit: float = 0,
+                 max_concurrent: int = 2, chunk_size: int = 1024 * 1024, save_timeout: float = 600.0,
+                 compress_level: int = 3):
+        self.redis_service = redis_service
+        self.repository = repository
+        self.backup_path = backup_path
+        self.rate_limit = rate_limit
+        self.max_concurrent = max(1, max_concurrent)
+        self.chunk_size = chunk_size
+        self.save_timeout = save_timeout
+        self.compress_level = compress_level
+        self.limiter = RateLimiter(rate_limit)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix='backup')
+        # redis_id -> backup in progress, one backup per instance at a time
+        self._active: Dict[str, Backup] = {}
+        self._lock = threading.Lock()
+
+    def recover(self) -> List[str]:
+        """Fail backups interrupted by a restart of the agent and remove their partial archives"""
+        failed = []
+        for backup in self.repository.find_unfinished():
+            self._remove_file(backup.path + '.part')
+            backup.status = BackupStatus.FAILED
+            backup.error = 'Interrupted by an agent restart'
+            backup.finished_at = datetime.now()
+            self.repository.save(backup)
+            failed.append(backup.id)
+        return failed
+
+    def create_backup(self, redis_id: str) -> Backup:
+        instance = self.redis_service.repository.find_by_id(redis_id)
+        if not instance:
+            raise ValueError(f"Redis instance {redis_id} not found")
+        backup_id = f"{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        backup = Backup(id=backup_id, redis_id=redis_id,
+                        path=os.path.join(self.backup_path, redis_id, f"{backup_id}.tar.gz"))
+        with self._lock:
+            if redis_id in self._active:
+                raise RuntimeError(f"A backup of Redis instance {redis_id} is already in progress")
+            self._active[redis_id] = backup
+        try:
+            self.repository.save(backup)
+            self._executor.submit(self._run, backup)
+        except Exception:
+            with self._lock:
+                self._active.pop(redis_id, None)
+            raise
+        return backup
+
+    def wait(self, backup_id: str, timeout: Optional[float] = None) -> Backup:
+        backup = self.get_backup(backup_id)
+        if not backup.finished:
+            backup.done.wait(timeout)
+        return backup
+
+    def get_backup(self, backup_id: str) -> Backup:
+        with self._lock:
+            for backup in self._active.values():
+                if backup.id == backup_id:
+                    return backup
+        backup = self.repository.find_by_id(backup_id)
+        if not backup:
+            raise ValueError(f"Backup {backup_id} not found")
+        return backup
+
+    def list_backups(self, redis_id: Optional[str] = None) -> List[Backup]:
+        with self._lock:
+            active = {backup.id: backup for backup in self._active.values()}
+        return [active.get(backup.id, backup) for backup in self.repository.find_all(redis_id)]
+
+    def delete_backup(self, backup_id: str):
+        backup = self.get_backup(backup_id)
+        if not backup.finished:
+            raise RuntimeError(f"Backup {backup_id} is still {backup.status.value}")
+        self._remove_file(backup.path)
+        self.repository.delete(backup_id)
+
+    def read_archive(self, backup_id: str) -> Iterator[bytes]:
+        """Chunks of a finished archive for download, drawn from the same rate limit"""
+        backup = self._finished_backup(backup_id)
+        with open(backup.path, 'rb') as f:
+            reader = _ThrottledFile(f, self.limiter, self.chunk_size)
+            while True:
+                chunk = reader.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def archive_info(self, backup_id: str) -> Tuple[Backup, int]:
+        backup = self._finished_backup(backup_id)
+        return backup, os.path.getsize(backup.path)
+
+    @timed('backup.restore')
+    def restore_backup(self, backup_id: str, redis_id: str, profile: Optional[str] = None,
+                       overrides: Optional[Dict] = None, tier: Optional[str] = None,
+                       start: bool = False, **transport) -> RedisInstance:
+        """
+        Create a new instance from a backup. The data directory is seeded before the
+        first start, profile and settings of the source instance apply unless given.
+        """
+        backup = self._finished_backup(backup_id)
+        manifest = self._read_manifest(backup.path)
+        if profile is None:
+            profile = manifest.get('profile', 'default')
+            settings = {**manifest.get('settings', {}), **(overrides or {})}
+        else:
+            settings = overrides
+        instance = self.redis_service.create_instance(redis_id, profile, settings or None,
+                                                      tier=tier or manifest.get('tier', 'standard'), **transport)
+        try:
+            with phase('restore.extract'):
+                self._extract(backup.path, instance.data_dir)
+        except Exception as e:
+            try:
+                self.redis_service.delete_instance(redis_id)
+            except Exception as cleanup_error:
+                print(f"Failed to remove partially restored Redis instance {redis_id}: {cleanup_error}")
+            raise RuntimeError(f"Failed to restore backup {backup_id} into {redis_id}: {e}")
+        print(f"Restored backup {backup_id} of {backup.redis_id} into Redis instance {redis_id}")
+        if start:
+            instance = self.redis_service.start_instance(redis_id)
+        return instance
+
+    def stats(self) -> Dict:
+        with self._lock:
+            active = list(self._active.values())
+        return {
+            'rate_limit_bytes': self.rate_limit,
+            'max_concurrent': self.max_concurrent,
+            'running': sum(1 for backup in active if backup.status == BackupStatus.RUNNING),
+            'pending': sum(1 for backup in active if backup.status == BackupStatus.PENDING)
+        }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _finished_backup(self, backup_id: str) -> Backup:
+        backup = self.get_backup(backup_id)
+        if backup.status != BackupStatus.SUCCEEDED:
+            raise RuntimeError(f"Backup {backup_id} is {backup.status.value}")
+        if not os.path.exists(backup.path):
+            raise RuntimeError(f"Archive of backup {backup_id} is missing")
+        return backup
+
+    @timed('backup.run')
+    def _run(self, backup: Backup):
+        backup.status = BackupStatus.RUNNING
+        backup.started_at = datetime.now()
+        self.repository.save(backup)
+        part_path = backup.path + '.part'
+        try:
+            instance = self.redis_service.repository.find_by_id(backup.redis_id)
+            if not instance:
+                raise ValueError(f"Redis instance {backup.redis_id} not found")
+            if instance.status == RedisStatus.RUNNING:
+                with phase('backup.snapshot'):
+                    backup.lastsave = self._snapshot(instance)
+            with open(instance.config_path, 'r') as f:
+                config = f.read()
+            files = self._data_files(instance, config)
+            backup.files = [name for name, _, _ in files]
+            manifest = {
+                'backup_id': backup.id,
+                'redis_id': instance.id,
+                'created_at': backup.created_at.isoformat(),
+                'lastsave': backup.lastsave,
+                'profile': instance.profile,
+                'tier': instance.tier,
+                'settings': read_settings(config),
+                'files': {name: size for name, _, size in files}
+            }
+            os.makedirs(os.path.dirname(backup.path), exist_ok=True)
+            with phase('backup.archive'):
+                backup.source_bytes = self._write_archive(part_path, manifest, files)
+            os.replace(part_path, backup.path)
+            backup.size_bytes = os.path.getsize(backup.path)
+            backup.status = BackupStatus.SUCCEEDED
+            print(f"Backup {backup.id} of Redis instance {backup.redis_id} done, "
+                  f"{backup.source_bytes} bytes into {backup.size_bytes}")
+        except Exception as e:
+            self._remove_file(part_path)
+            backup.status = BackupStatus.FAILED
+            backup.error = str(e)
+            print(f"Backup {backup.id} of Redis instance {backup.redis_id} failed: {e}")
+        finally:
+            backup.finished_at = datetime.now()
+            self.repository.save(backup)
+            with self._lock:
+                self._active.pop(backup.redis_id, None)
+            backup.done.set()
+
+    def _snapshot(self, instance: RedisInstance) -> int:
+        """BGSAVE and wait until LASTSAVE moves past its value before the save"""
+        client = self.redis_service.client_pool.get(instance)
+        deadline = time.monotonic() + self.save_timeout
+        before = client.lastsave()
+        # LASTSAVE has second resolution, a save finishing in the same second would go unnoticed
+        delay = int(before.timestamp()) + 1 - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        while True:
+            try:
+                client.bgsave()
+                break
+            except redis.exceptions.ResponseError as e:
+                # Another save or an AOF rewrite is running, wait for it and take our own
+                if not any(marker in str(e) for marker in SAVE_BUSY_ERRORS):
+                    raise
+                self._wait(client, deadline, 'rdb_bgsave_in_progress', 'aof_rewrite_in_progress')
+        while True:
+            info = client.info('persistence')
+            after = client.lastsave()
+            if after != before:
+                break
+            if not info.get('rdb_bgsave_in_progress'):
+                raise RuntimeError(f"BGSAVE failed with status {info.get('rdb_last_bgsave_status')}")
+            if time.monotonic() >= deadline:
+                raise RuntimeError("BGSAVE did not finish in time")
+            time.sleep(0.1)
+        # A rewrite swaps AOF files, archive them once it is done
+        self._wait(client, deadline, 'aof_rewrite_in_progress')
+        return int(after.timestamp())
+
+    @staticmethod
+    def _wait(client: redis.Redis, deadline: float, *flags: str):
+        while True:
+            info = client.info('persistence')
+            if not any(info.get(flag) for flag in flags):
+                return
+            if time.monotonic() >= deadline:
+                raise RuntimeError(f"Timed out waiting for {', '.join(flags)}")
+            time.sleep(0.1)
+
+    @staticmethod
+    def _data_files(instance: RedisInstance, config: str) -> List[Tuple[str, str, int]]:
+        """(archive name, path, size) of the RDB and AOF files, sizes are taken now"""
+        options = {}
+        for line in config.splitlines():
+            parts = line.split(None, 1)
+            if len(parts) == 2:
+                options[parts[0].lower()] = parts[1].strip().strip('"')
+        candidates = [options.get('dbfilename', 'dump.rdb')]
+        if options.get('appendonly') == 'yes':
+            # Redis 7 keeps a multi part AOF in a directory, older versions a single file
+            aof_dir = options.get('appenddirname', 'appendonlydir')
+            aof_path = os.path.join(instance.data_dir, aof_dir)
+            if os.path.isdir(aof_path):
+                candidates.extend(f"{aof_dir}/{name}" for name in sorted(os.listdir(aof_path)))
+            else:
+                candidates.append(options.get('appendfilename', 'appendonly.aof'))
+
+        files = []
+        for name in candidates:
+            path = os.path.join(instance.data_dir, name)
+            if os.path.isfile(path):
+                files.append((name, path, os.path.getsize(path)))
+        if not files:
+            raise RuntimeError(f"No data files found in {instance.data_dir}")
+        return files
+
+    def _write_archive(self, path: str, manifest: Dict, files: List[Tuple[str, str, int]]) -> int:
+        source_bytes = 0
+        with open(path, 'wb') as raw:
+            output = _ThrottledFile(raw, self.limiter, self.chunk_size)
+            with tarfile.open(fileobj=output, mode='w:gz', compresslevel=self.compress_level) as archive:
+                # The manifest goes first so restores can read it without inflating the data
+                data = json.dumps(manifest, indent=2).encode()
+                info = tarfile.TarInfo(MANIFEST_NAME)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                archive.addfile(info, io.BytesIO(data))
+                for name, file_path, size in files:
+                    with open(file_path, 'rb') as f:
+                        info = tarfile.TarInfo(DATA_PREFIX + name)
+                        info.size = size
+                        info.mtime = int(os.fstat(f.fileno()).st_mtime)
+                        reader = _ThrottledFile(f, self.limiter, self.chunk_size, limit=size)
+                        archive.addfile(info, reader)
+                        source_bytes += reader.bytes_read
+            raw.flush()
+            os.fsync(raw.fileno())
+        return source_bytes
+
+    @staticmethod
+    def _read_manifest(path: str) -> Dict:
+        with tarfile.open(path, mode='r:gz') as archive:
+            member = archive.next()
+            if member is None or member.name != MANIFEST_NAME:
+                raise RuntimeError(f"{path} is not a backup archive")
+            return json.load(archive.extractfile(member))
+
+    def _extract(self, path: str, data_dir: str):
+        root = os.path.realpath(data_dir)
+        with tarfile.open(path, mode='r:gz') as archive:
+            for member in archive:
+                if member.name == MANIFEST_NAME:
+                    continue
+                name = member.name[len(DATA_PREFIX):] if member.name.startswith(DATA_PREFIX) else None
+                target = os.path.realpath(os.path.join(root, name)) if name else None
+                if not member.isfile() or not target or not target.startswith(root + os.sep):
+                    raise RuntimeError(f"Unexpected entry {member.name} in backup archive")
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                source = archive.extractfile(member)
+                with open(target, 'wb') as f:
+                    output = _ThrottledFile(f, self.limiter, self.chunk_size)
+                    while True:
+                        chunk = source.read(self.chunk_size)
+                        if not chunk:
+                            break
+                        output.write(chunk)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    @staticmethod
+    def _remove_file(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
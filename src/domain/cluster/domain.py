@@ -0,0 +1,56 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Optional
+
+@dataclass
+class Placement:
+    redis_id: str
+    agent_id: str
+    created_at: datetime = field(default_factory=datetime.now)
+
+@dataclass
+class AgentNode:
+    id: str
+    url: str
+    registered_at: datetime = field(default_factory=datetime.now)
+    capacity: Optional[Dict] = None
+    last_seen: Optional[datetime] = None
+    error: Optional[str] = None
+    # Placements handed out since the last capacity report
+    pending: int = 0
+
+    # Weights of the load score, memory matters most for redis
+    MEMORY_WEIGHT = 0.5
+    CPU_WEIGHT = 0.3
+    PORT_WEIGHT = 0.2
+
+    def is_fresh(self, stale_after: float) -> bool:
+        return (self.error is None and self.last_seen is not None
+                and (datetime.now() - self.last_seen).total_seconds() <= stale_after)
+
+    def free_ports(self) -> int:
+        return self.capacity['free_ports'] - self.pending if self.capacity else 0
+
+    def load_score(self) -> float:
+        """0 for an idle host, 1 for a full one"""
+        capacity = self.capacity
+        memory = 1 - capacity['memory_available'] / capacity['memory_total']
+        if capacity.get('load_average'):
+            cpu = min(1.0, capacity['load_average'][0] / capacity['cpu_count'])
+        else:
+            cpu = capacity['cpu_percent'] / 100
+        ports = 1 - self.free_ports() / capacity['port_capacity']
+        return self.MEMORY_WEIGHT * memory + self.CPU_WEIGHT * cpu + self.PORT_WEIGHT * ports
+
+    def to_dict(self, stale_after: float) -> Dict:
+        return {
+            'id': self.id,
+            'url': self.url,
+            'registered_at': self.registered_at.isoformat(),
+            'healthy': self.is_fresh(stale_after),
+            'last_seen': self.last_seen.isoformat() if self.last_seen else None,
+            'error': self.error,
+            'load_score': round(self.load_score(), 4) if self.capacity else None,
+            'pending': self.pending,
+            'capacity': self.capacity
+        }
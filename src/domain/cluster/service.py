@@ -0,0 +1,324 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from domain.cluster.domain import AgentNode, Placement
+from domain.metrics.timing import timed
+
+class ClusterService:
+    """
+    Controller side of a multi-host deployment.
+    Polls the capacity of every agent, places new instances on the least loaded one
+    and routes every other call to the agent hosting the instance.
+    """
+    def __init__(self, repository, client_factory: Callable, poll_interval: float = 10.0,
+                 stale_after: float = 30.0, min_free_memory: int = 256 * 1024 * 1024, max_workers: int = 16,
+                 batch_timeout: float = 300.0):
+        self.repository = repository
+        self.client_factory = client_factory
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.min_free_memory = min_free_memory
+        self.max_workers = max_workers
+        # Agents answer a batch only once every item is done
+        self.batch_timeout = batch_timeout
+        self._lock = threading.Lock()
+        self._agents: Dict[str, AgentNode] = {agent.id: agent for agent in repository.find_agents()}
+        self._clients: Dict[str, object] = {}
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def register_agent(self, agent_id: str, url: str) -> AgentNode:
+        with self._lock:
+            agent = self._agents.get(agent_id)
+            if agent is None or agent.url != url:
+                agent = AgentNode(id=agent_id, url=url)
+                self._agents[agent_id] = agent
+                self._clients.pop(agent_id, None)
+        self.repository.save_agent(agent)
+        self._refresh_agent(agent)
+        return agent
+
+    def remove_agent(self, agent_id: str):
+        self.get_agent(agent_id)
+        placed = self.repository.find_placement_ids(agent_id)
+        if placed:
+            raise RuntimeError(f"Agent {agent_id} still hosts {len(placed)} instances")
+        with self._lock:
+            self._agents.pop(agent_id, None)
+            self._clients.pop(agent_id, None)
+        self.repository.delete_agent(agent_id)
+
+    def get_agent(self, agent_id: str) -> AgentNode:
+        with self._lock:
+            agent = self._agents.get(agent_id)
+        if not agent:
+            raise ValueError(f"Agent {agent_id} not found")
+        return agent
+
+    def get_agents(self) -> List[Dict]:
+        with self._lock:
+            agents = list(self._agents.values())
+        placements = self.repository.count_placements()
+        result = []
+        for agent in agents:
+            item = agent.to_dict(self.stale_after)
+            item['placements'] = placements.get(agent.id, 0)
+            result.append(item)
+        return result
+
+    @timed('cluster.refresh')
+    def refresh(self):
+        """Fetch the capacity of every agent concurrently"""
+        with self._lock:
+            agents = list(self._agents.values())
+        if not agents:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(agents))) as executor:
+            list(executor.map(self._refresh_agent, agents))
+
+    def choose_agent(self) -> AgentNode:
+        """
+        Least loaded healthy agent with a free port and memory to spare.
+        The choice is counted as pending until the agent reports again,
+        so a burst of creates spreads out instead of piling onto one host.
+        """
+        with self._lock:
+            candidates = [
+                agent for agent in self._agents.values()
+                if agent.is_fresh(self.stale_after)
+                and agent.free_ports() > 0
+                and agent.capacity['memory_available'] >= self.min_free_memory
+            ]
+            if not candidates:
+                raise RuntimeError("No agent has capacity for a new instance")
+            agent = min(candidates, key=lambda candidate: (
+                candidate.load_score(), candidate.capacity['instance_count'] + candidate.pending, candidate.id))
+            agent.pending += 1
+            return agent
+
+    @timed('cluster.create_instance')
+    def create_instance(self, redis_id: str, payload: Dict) -> Tuple[int, Dict]:
+        agent = self.choose_agent()
+        try:
+            if not self.repository.reserve_placement(Placement(redis_id=redis_id, agent_id=agent.id)):
+                raise ValueError(f"Redis instance {redis_id} already exists")
+            try:
+                status, body, _ = self._client(agent).request('POST', '/api/redis', payload)
+            except Exception:
+                self.repository.delete_placement(redis_id)
+                raise
+            result = json.loads(body) if body else {}
+            if status >= 300:
+                self.repository.delete_placement(redis_id)
+                self._release_pending(agent)
+            else:
+                result['agent'] = agent.id
+            return status, result
+        except Exception:
+            self._release_pending(agent)
+            raise
+
+    def agent_for(self, redis_id: str) -> AgentNode:
+        placement = self.repository.find_placement(redis_id) or self._locate(redis_id)
+        if not placement:
+            raise ValueError(f"Redis instance {redis_id} not found")
+        return self.get_agent(placement.agent_id)
+
+    def _locate(self, redis_id: str) -> Optional[Placement]:
+        """
+        Placement miss: ask the healthy agents whether one of them hosts the instance,
+        e.g. because it was created on the agent directly, and record where it is
+        """
+        agents = self._fresh_agents()
+        if not agents:
+            return None
+
+        def hosts(agent: AgentNode) -> bool:
+            try:
+                status, _, _ = self._client(agent).request('GET', f"/api/redis/{redis_id}/status")
+            except RuntimeError:
+                return False
+            return status == 200
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(agents))) as executor:
+            found = [agent for agent, hit in zip(agents, executor.map(hosts, agents)) if hit]
+        if not found:
+            return None
+        self.repository.reserve_placement(Placement(redis_id=redis_id, agent_id=found[0].id))
+        return self.repository.find_placement(redis_id)
+
+    def forward(self, agent: AgentNode, method: str, path: str, query: Optional[Dict] = None,
+                payload: Optional[Dict] = None) -> Tuple[int, bytes, str]:
+        return self._client(agent).request(method, path, payload, query)
+
+    @timed('cluster.delete_instance')
+    def delete_instance(self, redis_id: str, query: Optional[Dict] = None) -> Tuple[int, bytes, str]:
+        """Deletes synchronously so the placement is only dropped once the agent is done"""
+        agent = self.agent_for(redis_id)
+        status, body, content_type = self.forward(agent, 'DELETE', f"/api/redis/{redis_id}",
+                                                  {**(query or {}), 'wait': 'true'})
+        if status < 300 or status == 404:
+            self.repository.delete_placement(redis_id)
+        return status, body, content_type
+
+    @timed('cluster.list_instances')
+    def list_instances(self, query: Optional[Dict] = None) -> List[Dict]:
+        """Listings of all healthy agents merged, each item tagged with its agent"""
+        return self._gather('/api/redis', query)
+
+    @timed('cluster.fleet_status')
+    def fleet_status(self) -> List[Dict]:
+        """Runtime status of every instance on every healthy agent"""
+        return self._gather('/api/redis/status')
+
+    @timed('cluster.batch')
+    def batch(self, action: str, redis_ids: List[str], payload: Optional[Dict] = None) -> Dict:
+        """
+        Batch create, start, stop or delete across agents. Ids are grouped by the agent
+        hosting them, new ids are placed one by one like single creates, and every
+        group goes to its agent's batch route in one request.
+        """
+        results: Dict[str, Dict] = {}
+        agents: Dict[str, AgentNode] = {}
+        groups: Dict[str, List[str]] = {}
+        for redis_id in dict.fromkeys(redis_ids):
+            try:
+                agent = self._place(redis_id) if action == 'create' else self.agent_for(redis_id)
+            except (ValueError, RuntimeError) as e:
+                results[redis_id] = {'id': redis_id, 'ok': False, 'error': str(e)}
+                continue
+            agents[agent.id] = agent
+            groups.setdefault(agent.id, []).append(redis_id)
+
+        def send(agent_id: str) -> List[Dict]:
+            ids = groups[agent_id]
+            try:
+                status, body, _ = self._client(agents[agent_id]).request(
+                    'POST', '/api/redis/batch', {**(payload or {}), 'action': action, 'redis_ids': ids},
+                    timeout=self.batch_timeout)
+                reply = json.loads(body) if body else {}
+                if status < 300:
+                    return reply['results']
+                error = reply.get('error') or f"Agent {agent_id} returned {status}"
+            except Exception as e:
+                error = str(e)
+            return [{'id': redis_id, 'ok': False, 'error': error} for redis_id in ids]
+
+        if groups:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(groups))) as executor:
+                replies = list(executor.map(send, groups))
+            for agent_id, items in zip(groups, replies):
+                for item in items:
+                    item['agent'] = agent_id
+                    results[item['id']] = item
+                    if action == 'create' and not item['ok']:
+                        self.repository.delete_placement(item['id'])
+                        self._release_pending(agents[agent_id])
+                    elif action == 'delete' and item['ok']:
+                        self.repository.delete_placement(item['id'])
+
+        ordered = [results[redis_id] for redis_id in dict.fromkeys(redis_ids)]
+        return {
+            'action': action,
+            'succeeded': sum(1 for item in ordered if item['ok']),
+            'failed': sum(1 for item in ordered if not item['ok']),
+            'results': ordered
+        }
+
+    def _place(self, redis_id: str) -> AgentNode:
+        """Pick an agent for a new instance and claim the id for it"""
+        agent = self.choose_agent()
+        if not self.repository.reserve_placement(Placement(redis_id=redis_id, agent_id=agent.id)):
+            self._release_pending(agent)
+            raise ValueError(f"Redis instance {redis_id} already exists")
+        return agent
+
+    def _gather(self, path: str, query: Optional[Dict] = None) -> List[Dict]:
+        """GET a list from every healthy agent, merged by id and tagged with the agent"""
+        agents = self._fresh_agents()
+        if not agents:
+            return []
+
+        def fetch(agent: AgentNode) -> List[Dict]:
+            items = self._client(agent).get_json(path, query)
+            for item in items:
+                item['agent'] = agent.id
+            return items
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(agents))) as executor:
+            listings = list(executor.map(fetch, agents))
+        return sorted((item for items in listings for item in items), key=lambda item: item.get('id', ''))
+
+    def _fresh_agents(self) -> List[AgentNode]:
+        with self._lock:
+            return [agent for agent in self._agents.values() if agent.is_fresh(self.stale_after)]
+
+    @timed('cluster.sync_placements')
+    def sync_placements(self) -> Dict[str, int]:
+        """
+        Rebuild placements from what each reachable agent reports,
+        this adopts instances created on an agent directly
+        """
+        with self._lock:
+            agents = list(self._agents.values())
+        counts = {}
+        for agent in agents:
+            try:
+                items = self._client(agent).get_json('/api/redis', {'fields': 'id'})
+            except Exception as e:
+                print(f"Error listing instances of agent {agent.id}: {e}")
+                continue
+            redis_ids = [item['id'] for item in items]
+            self.repository.replace_agent_placements(agent.id, redis_ids)
+            counts[agent.id] = len(redis_ids)
+        return counts
+
+    def _client(self, agent: AgentNode):
+        with self._lock:
+            client = self._clients.get(agent.id)
+            if client is None:
+                client = self.client_factory(agent.url)
+                self._clients[agent.id] = client
+            return client
+
+    def _refresh_agent(self, agent: AgentNode):
+        try:
+            capacity = self._client(agent).get_json('/api/agent/capacity')
+        except Exception as e:
+            with self._lock:
+                if agent.error is None:
+                    print(f"Agent {agent.id} is unavailable: {e}")
+                agent.error = str(e)
+            return
+        with self._lock:
+            agent.capacity = capacity
+            agent.last_seen = datetime.now()
+            agent.error = None
+            agent.pending = 0
+
+    def _release_pending(self, agent: AgentNode):
+        with self._lock:
+            agent.pending = max(0, agent.pending - 1)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing agents: {e}")
+            self._stop_event.wait(self.poll_interval)
@@ -0,0 +1,77 @@
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Deque, Dict, Optional, Tuple
+from domain.job.domain import Job, JobStatus
+
+JobFunction = Callable[[Job], Optional[Dict]]
+
+
+class JobManager:
+    """
+    Runs lifecycle operations on a bounded executor.
+    Jobs for the same instance run one after another in submission order,
+    queued jobs wait in a per-instance queue instead of occupying a worker.
+    """
+    def __init__(self, max_workers: int = 4, retention_seconds: float = 3600.0):
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs: Dict[str, Job] = {}
+        self._queues: Dict[str, Deque[Tuple[Job, JobFunction]]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, action: str, redis_id: str, fn: JobFunction) -> Job:
+        job = Job(id=uuid.uuid4().hex, action=action, redis_id=redis_id, created_at=datetime.now())
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+            pending = self._queues.get(redis_id)
+            if pending is not None:
+                pending.append((job, fn))
+                return job
+            self._queues[redis_id] = deque()
+        self._executor.submit(self._run, job, fn)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn: JobFunction):
+        job.status = JobStatus.RUNNING
+        job.progress = "running"
+        job.started_at = datetime.now()
+        try:
+            job.result = fn(job)
+            status, progress = JobStatus.SUCCEEDED, "done"
+        except Exception as e:
+            job.exception = e
+            job.error = str(e)
+            status, progress = JobStatus.FAILED, "failed"
+        # finished_at goes first, a finished job without it would break _prune
+        job.finished_at = datetime.now()
+        job.status = status
+        job.progress = progress
+        job.done.set()
+        self._next(job.redis_id)
+
+    def _next(self, redis_id: str):
+        with self._lock:
+            pending = self._queues.get(redis_id)
+            if not pending:
+                self._queues.pop(redis_id, None)
+                return
+            job, fn = pending.popleft()
+        self._executor.submit(self._run, job, fn)
+
+    def _prune(self):
+        now = datetime.now()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at and (now - job.finished_at).total_seconds() > self.retention_seconds]
+        for job_id in expired:
+            del self._jobs[job_id]
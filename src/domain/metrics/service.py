@@ -0,0 +1,143 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from domain.process.service import ProcessManager
+from domain.redis.client import RedisClientPool
+from domain.redis.domain import RedisInstance, RedisStatus
+
+# (metric name, INFO field, type, help)
+INFO_METRICS = [
+    ('nanu_redis_instantaneous_ops_per_sec', 'instantaneous_ops_per_sec', 'gauge', 'Commands processed per second'),
+    ('nanu_redis_used_memory_bytes', 'used_memory', 'gauge', 'Memory allocated by Redis'),
+    ('nanu_redis_connected_clients', 'connected_clients', 'gauge', 'Connected clients'),
+    ('nanu_redis_keyspace_hits_total', 'keyspace_hits', 'counter', 'Successful key lookups'),
+    ('nanu_redis_keyspace_misses_total', 'keyspace_misses', 'counter', 'Failed key lookups'),
+    ('nanu_redis_evicted_keys_total', 'evicted_keys', 'counter', 'Keys evicted due to maxmemory'),
+    ('nanu_redis_expired_keys_total', 'expired_keys', 'counter', 'Keys removed by expiry'),
+    ('nanu_redis_commands_processed_total', 'total_commands_processed', 'counter', 'Commands processed'),
+]
+
+
+@dataclass
+class InstanceSample:
+    instance: RedisInstance
+    up: bool
+    info: Dict = field(default_factory=dict)
+    latency: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    rss_bytes: Optional[int] = None
+    cpu_percent: Optional[float] = None
+
+
+class MetricsCollector:
+    """
+    Collects INFO from every running instance concurrently and renders it in the
+    Prometheus text format. Results are cached for cache_seconds so frequent
+    scrapes do not add load on the tenants.
+    """
+    def __init__(self, repository, client_pool: RedisClientPool, cache_seconds: float = 10.0, max_workers: int = 16):
+        self.repository = repository
+        self.client_pool = client_pool
+        self.cache_seconds = cache_seconds
+        self.max_workers = max_workers
+        self._cached: Optional[Tuple[float, str]] = None
+        self._lock = threading.Lock()
+
+    def render(self) -> str:
+        # Concurrent scrapes wait for one collection instead of each running their own
+        with self._lock:
+            if self._cached and time.monotonic() - self._cached[0] < self.cache_seconds:
+                return self._cached[1]
+            started = time.monotonic()
+            samples = self.collect()
+            text = self._format(samples, time.monotonic() - started)
+            self._cached = (time.monotonic(), text)
+            return text
+
+    def collect(self) -> List[InstanceSample]:
+        instances = [instance for instance in self.repository.find_all()
+                     if (instance.status == RedisStatus.RUNNING or instance.service_status == 1)
+                     and instance.status != RedisStatus.HIBERNATING]
+        listeners = ProcessManager.snapshot_listeners()
+
+        if instances:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(instances))) as pool:
+                samples = list(pool.map(self._sample, instances))
+        else:
+            samples = []
+
+        for sample in samples:
+            process = listeners.get(sample.instance.port)
+            if process is None and sample.info.get('process_id'):
+                # Socket-only instances have no TCP listener, INFO reports the pid instead
+                process = ProcessManager.find_by_pid(sample.info['process_id'])
+            if process:
+                usage = ProcessManager.get_usage(process)
+                sample.rss_bytes = usage['rss_bytes']
+                sample.cpu_percent = usage['cpu_percent']
+        return samples
+
+    def _sample(self, instance: RedisInstance) -> InstanceSample:
+        try:
+            client = self.client_pool.get(instance)
+            info = client.info()
+        except Exception:
+            return InstanceSample(instance=instance, up=False)
+
+        latency = {}
+        try:
+            # Only available on Redis 7+
+            for key, value in client.info('latencystats').items():
+                if key.startswith('latency_percentiles_usec_') and isinstance(value, dict):
+                    latency[key[len('latency_percentiles_usec_'):]] = value
+        except Exception:
+            pass
+        return InstanceSample(instance=instance, up=True, info=info, latency=latency)
+
+    @staticmethod
+    def _labels(instance: RedisInstance, **extra) -> str:
+        labels = {'id': instance.id, 'port': str(instance.port or '')}
+        labels.update(extra)
+        return ','.join(
+            '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for key, value in labels.items()
+        )
+
+    def _format(self, samples: List[InstanceSample], duration: float) -> str:
+        lines = []
+
+        def family(name: str, metric_type: str, help_text: str):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+
+        family('nanu_redis_up', 'gauge', 'Whether the instance answered INFO')
+        for sample in samples:
+            lines.append(f"nanu_redis_up{{{self._labels(sample.instance)}}} {1 if sample.up else 0}")
+
+        for name, key, metric_type, help_text in INFO_METRICS:
+            family(name, metric_type, help_text)
+            for sample in samples:
+                if key in sample.info:
+                    lines.append(f"{name}{{{self._labels(sample.instance)}}} {sample.info[key]}")
+
+        family('nanu_redis_command_latency_usec', 'gauge', 'Command latency percentiles in microseconds')
+        for sample in samples:
+            for command, percentiles in sorted(sample.latency.items()):
+                for quantile, value in sorted(percentiles.items()):
+                    labels = self._labels(sample.instance, command=command, quantile=quantile)
+                    lines.append(f"nanu_redis_command_latency_usec{{{labels}}} {value}")
+
+        family('nanu_redis_process_cpu_percent', 'gauge', 'CPU usage of the redis-server process')
+        for sample in samples:
+            if sample.cpu_percent is not None:
+                lines.append(f"nanu_redis_process_cpu_percent{{{self._labels(sample.instance)}}} {sample.cpu_percent}")
+
+        family('nanu_redis_process_rss_bytes', 'gauge', 'Resident memory of the redis-server process')
+        for sample in samples:
+            if sample.rss_bytes is not None:
+                lines.append(f"nanu_redis_process_rss_bytes{{{self._labels(sample.instance)}}} {sample.rss_bytes}")
+
+        family('nanu_redis_scrape_duration_seconds', 'gauge', 'Time spent collecting metrics from all instances')
+        lines.append(f"nanu_redis_scrape_duration_seconds {duration:.6f}")
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,123 @@
+import bisect
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+# Upper bounds in milliseconds, the last bucket catches everything slower
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf'))
+
+
+class Histogram:
+    __slots__ = ('count', 'total_ms', 'max_ms', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+
+    def observe(self, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        self.buckets[bisect.bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th percentile"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, bucket in zip(BUCKETS_MS, self.buckets):
+            seen += bucket
+            if seen >= rank:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else None,
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': self.percentile(0.5),
+            'p90_ms': self.percentile(0.9),
+            'p99_ms': self.percentile(0.99),
+            'buckets': {('+Inf' if bound == float('inf') else str(bound)): count
+                        for bound, count in zip(BUCKETS_MS, self.buckets)}
+        }
+
+
+class TimingRegistry:
+    """
+    Latency histograms per named phase. Recording costs a perf_counter call,
+    a dict lookup and a bisect, cheap enough to leave on in production.
+    Operations slower than slow_threshold_ms are printed and kept in a short log.
+    """
+    def __init__(self, slow_threshold_ms: Optional[float] = None, slow_log_size: int = 100):
+        self.enabled = True
+        self.slow_threshold_ms = slow_threshold_ms
+        self._histograms: Dict[str, Histogram] = {}
+        self._slow: Deque[Dict] = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, elapsed_ms: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(elapsed_ms)
+        if self.slow_threshold_ms is not None and elapsed_ms >= self.slow_threshold_ms:
+            self._slow.append({'name': name, 'elapsed_ms': round(elapsed_ms, 3), 'at': datetime.now().isoformat()})
+            print(f"Slow operation {name}: {elapsed_ms:.1f}ms")
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000)
+
+    def timed(self, name: str):
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(name, (time.perf_counter() - started) * 1000)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: histogram.to_dict() for name, histogram in sorted(self._histograms.items())}
+
+    def slow_operations(self) -> List[Dict]:
+        return list(self._slow)
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+        self._slow.clear()
+
+
+# Process-wide registry shared by the service, repository and process layers
+timings = TimingRegistry()
+
+
+def timed(name: str):
+    return timings.timed(name)
+
+
+def phase(name: str):
+    return timings.phase(name)
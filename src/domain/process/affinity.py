@@ -0,0 +1,117 @@
+import sys
+import threading
+from typing import Dict, List, Optional, Sequence
+import psutil
+
+class CpuPlacer:
+    """
+    Pins redis-server processes to cores so tenants keep their cache locality.
+    The last dedicated_cores cores are handed out exclusively to premium instances,
+    everything else shares the remaining cores round-robin or by least loaded core.
+    Assignments stay in memory until released, so a restarted process gets its old cores back.
+    """
+    STRATEGIES = ('round_robin', 'least_loaded')
+
+    def __init__(self, strategy: str = 'least_loaded', dedicated_cores: int = 0,
+                 cores: Optional[Sequence[int]] = None):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown CPU placement strategy: {strategy}")
+        self.strategy = strategy
+        self.supported = hasattr(psutil.Process, 'cpu_affinity')
+        if cores is None:
+            cores = psutil.Process().cpu_affinity() if self.supported else list(range(psutil.cpu_count() or 1))
+        cores = sorted(cores)
+        # Keep at least one shared core for standard instances
+        dedicated_cores = max(0, min(dedicated_cores, len(cores) - 1))
+        split = len(cores) - dedicated_cores
+        self.shared_cores: List[int] = cores[:split]
+        self.dedicated_cores: List[int] = cores[split:]
+        self._assignments: Dict[str, List[int]] = {}
+        self._dedicated_owner: Dict[int, str] = {}
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def assign(self, redis_id: str, tier: str = 'standard', threads: int = 1) -> List[int]:
+        """Cores of an instance, threads > 1 (io-threads) gets that many shared cores"""
+        with self._lock:
+            cores = self._assignments.get(redis_id)
+            if cores:
+                return list(cores)
+            cores = self._take_dedicated(redis_id) if tier == 'premium' else None
+            if cores is None:
+                cores = self._pick_shared(max(1, min(threads, len(self.shared_cores))))
+            self._assignments[redis_id] = cores
+            return list(cores)
+
+    def apply(self, redis_id: str, pid: int, tier: str = 'standard', threads: int = 1) -> Optional[List[int]]:
+        """Pin a process to the cores of its instance, None when pinning is unavailable"""
+        if not self.supported:
+            return None
+        cores = self.assign(redis_id, tier, threads)
+        try:
+            process = psutil.Process(pid)
+            process.cpu_affinity(cores)
+            if sys.platform.startswith('linux'):
+                # Linux pins single threads, background threads started before this point
+                # keep the old mask while later ones inherit it from the main thread
+                for thread in process.threads():
+                    if thread.id != pid:
+                        try:
+                            psutil.Process(thread.id).cpu_affinity(cores)
+                        except psutil.NoSuchProcess:
+                            pass
+            return cores
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess, OSError) as e:
+            print(f"Failed to pin Redis instance {redis_id} to cores {cores}: {e}")
+            return None
+
+    def release(self, redis_id: str):
+        with self._lock:
+            cores = self._assignments.pop(redis_id, None)
+            for core in cores or []:
+                if self._dedicated_owner.get(core) == redis_id:
+                    del self._dedicated_owner[core]
+
+    def get(self, redis_id: str) -> Optional[List[int]]:
+        with self._lock:
+            cores = self._assignments.get(redis_id)
+            return list(cores) if cores else None
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            per_core = {core: 0 for core in self.shared_cores + self.dedicated_cores}
+            for cores in self._assignments.values():
+                for core in cores:
+                    per_core[core] = per_core.get(core, 0) + 1
+            return {
+                'supported': self.supported,
+                'strategy': self.strategy,
+                'shared_cores': self.shared_cores,
+                'dedicated_cores': self.dedicated_cores,
+                'dedicated_owners': dict(self._dedicated_owner),
+                'instances_per_core': per_core
+            }
+
+    def _take_dedicated(self, redis_id: str) -> Optional[List[int]]:
+        for core in self.dedicated_cores:
+            if core not in self._dedicated_owner:
+                self._dedicated_owner[core] = redis_id
+                return [core]
+        print(f"No dedicated core left for premium Redis instance {redis_id}, using shared cores")
+        return None
+
+    def _pick_shared(self, count: int) -> List[int]:
+        if self.strategy == 'round_robin':
+            cores = [self.shared_cores[(self._next + offset) % len(self.shared_cores)] for offset in range(count)]
+            self._next = (self._next + count) % len(self.shared_cores)
+            return cores
+
+        # Fewest pinned instances first, measured utilisation breaks ties
+        pinned = {core: 0 for core in self.shared_cores}
+        for cores in self._assignments.values():
+            for core in cores:
+                if core in pinned:
+                    pinned[core] += 1
+        usage = psutil.cpu_percent(interval=None, percpu=True)
+        return sorted(self.shared_cores,
+                      key=lambda core: (pinned[core], usage[core] if core < len(usage) else 0.0, core))[:count]
@@ -0,0 +1,39 @@
+import subprocess
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Deque, Dict, Optional
+
+@dataclass
+class ProcessEntry:
+    redis_id: str
+    pid: int
+    create_time: float
+
+@dataclass
+class SupervisedProcess:
+    redis_id: str
+    popen: Optional[subprocess.Popen] = None
+    state: str = "running"
+    started_at: Optional[datetime] = None
+    restart_count: int = 0
+    last_exit_code: Optional[int] = None
+    last_exit_at: Optional[datetime] = None
+    next_restart_at: Optional[datetime] = None
+    expect_exit: bool = False
+    restarting: bool = False
+    crashes: Deque[float] = field(default_factory=deque)
+    exited: threading.Event = field(default_factory=threading.Event)
+
+    def to_dict(self) -> Dict:
+        return {
+            'state': self.state,
+            'pid': self.popen.pid if self.popen else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'restart_count': self.restart_count,
+            'last_exit_code': self.last_exit_code,
+            'last_exit_at': self.last_exit_at.isoformat() if self.last_exit_at else None,
+            'next_restart_at': self.next_restart_at.isoformat() if self.next_restart_at else None,
+            'recent_crashes': len(self.crashes)
+        }
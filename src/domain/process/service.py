@@ -1,14 +1,24 @@
+import os
 import psutil
-from typing import Optional
+import threading
+from typing import Dict, Optional, Tuple
 import socket
+from domain.metrics.timing import timed
 
 class ProcessManager:
+    PROCESS_NAMES = tuple(os.environ.get('NANU_REDIS_PROCESS_NAMES', 'redis-server.exe,redis-server').split(','))
+
+    # Process handles reused across snapshots so cpu_percent() measures between calls
+    _usage_handles: Dict[Tuple[int, float], psutil.Process] = {}
+    _usage_lock = threading.Lock()
+
     @staticmethod
+    @timed('process.scan')
     def find_redis_process(port: int) -> Optional[psutil.Process]:
         try:
             for proc in psutil.process_iter(['pid', 'name']):
                 try:
-                    if proc.info['name'] == 'redis-server.exe':
+                    if proc.info['name'] in ProcessManager.PROCESS_NAMES:
                         for conn in proc.connections():
                             if conn.laddr.port == port:
                                 return proc
@@ -18,6 +28,89 @@ class ProcessManager:
             print(f"Error checking process: {e}")
         return None
 
+    @staticmethod
+    @timed('process.lookup')
+    def get_process(pid: int, create_time: float) -> Optional[psutil.Process]:
+        """Return the process only if the pid still belongs to the same process start"""
+        try:
+            proc = psutil.Process(pid)
+            if abs(proc.create_time() - create_time) > 0.01:
+                return None
+            if proc.status() == psutil.STATUS_ZOMBIE:
+                return None
+            return proc
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+
+    @staticmethod
+    def find_by_pid(pid: int) -> Optional[psutil.Process]:
+        try:
+            proc = psutil.Process(pid)
+            if proc.name() not in ProcessManager.PROCESS_NAMES:
+                return None
+            return proc
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+
+    @staticmethod
+    def get_create_time(pid: int) -> Optional[float]:
+        try:
+            return psutil.Process(pid).create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+
+    @staticmethod
+    @timed('process.snapshot')
+    def snapshot_listeners() -> Dict[int, psutil.Process]:
+        """
+        Map every listening port to its redis-server process using a single
+        pass over the process table and the system connection table
+        """
+        redis_processes = {}
+        for proc in psutil.process_iter(['pid', 'name']):
+            if proc.info['name'] in ProcessManager.PROCESS_NAMES:
+                redis_processes[proc.pid] = proc
+
+        listeners = {}
+        try:
+            for conn in psutil.net_connections(kind='inet'):
+                if conn.status == psutil.CONN_LISTEN and conn.laddr and conn.pid in redis_processes:
+                    listeners[conn.laddr.port] = redis_processes[conn.pid]
+        except psutil.AccessDenied:
+            # System-wide table needs privileges on some platforms, ask each redis-server instead
+            for proc in redis_processes.values():
+                try:
+                    for conn in proc.connections(kind='inet'):
+                        if conn.status == psutil.CONN_LISTEN and conn.laddr:
+                            listeners[conn.laddr.port] = proc
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    continue
+        return listeners
+
+    @staticmethod
+    def get_usage(proc: psutil.Process) -> Dict:
+        """RSS and CPU usage of a process, cpu_percent is relative to the previous call"""
+        try:
+            key = (proc.pid, proc.create_time())
+            with ProcessManager._usage_lock:
+                handle = ProcessManager._usage_handles.get(key)
+                if handle is None:
+                    handle = proc
+                    ProcessManager._usage_handles[key] = handle
+            with handle.oneshot():
+                return {
+                    'rss_bytes': handle.memory_info().rss,
+                    'cpu_percent': handle.cpu_percent(interval=None)
+                }
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return {'rss_bytes': None, 'cpu_percent': None}
+
+    @staticmethod
+    def prune_usage_handles(live_pids):
+        with ProcessManager._usage_lock:
+            for key in [key for key in ProcessManager._usage_handles if key[0] not in live_pids]:
+                del ProcessManager._usage_handles[key]
+
     @staticmethod
     def is_port_in_use(port: int) -> bool:
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
@@ -25,4 +118,4 @@ class ProcessManager:
                 s.bind(('localhost', port))
                 return False
             except socket.error:
-                return True
\ No newline at end of file
+                return True
@@ -0,0 +1,198 @@
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+from domain.process.domain import SupervisedProcess
+
+
+class ProcessSupervisor:
+    """
+    Owns the redis-server children spawned by the service.
+    A waiter thread per child blocks in Popen.wait(), which also reaps it, so exits are
+    noticed immediately without polling. Unexpected exits are restarted through the
+    restart handler with exponential backoff; more than crash_loop_limit crashes within
+    crash_loop_window seconds parks the instance in the crash_loop state.
+    """
+    def __init__(self, base_backoff: float = 1.0, max_backoff: float = 60.0,
+                 crash_loop_limit: int = 5, crash_loop_window: float = 300.0):
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.crash_loop_limit = crash_loop_limit
+        self.crash_loop_window = crash_loop_window
+        self._restart_handler: Optional[Callable[[str], None]] = None
+        self._children: Dict[str, SupervisedProcess] = {}
+        self._lock = threading.Lock()
+
+    def set_restart_handler(self, handler: Callable[[str], None]):
+        """handler(redis_id) restarts the instance, or returns without spawning if it should stay down"""
+        self._restart_handler = handler
+
+    def attach(self, redis_id: str, popen: subprocess.Popen):
+        with self._lock:
+            record = self._children.get(redis_id)
+            if record is None or not record.restarting:
+                # A start from outside the supervisor clears the crash history
+                record = SupervisedProcess(redis_id=redis_id, restart_count=record.restart_count if record else 0)
+                self._children[redis_id] = record
+            record.popen = popen
+            record.state = 'running'
+            record.started_at = datetime.now()
+            record.next_restart_at = None
+            record.expect_exit = False
+            record.exited = threading.Event()
+            exited = record.exited
+        threading.Thread(target=self._wait, args=(redis_id, popen, exited), daemon=True,
+                         name=f'supervise-{redis_id}').start()
+
+    def expect_exit(self, redis_id: str):
+        """Mark the next exit as intentional and cancel any pending restart"""
+        with self._lock:
+            record = self._children.get(redis_id)
+            if record:
+                record.expect_exit = True
+                record.restarting = False
+                if record.state in ('backoff', 'restarting'):
+                    record.state = 'stopped'
+                    record.next_restart_at = None
+
+    def stop(self, redis_id: str, timeout: float = 5.0, kill: bool = False) -> bool:
+        """
+        Terminate a supervised child, returns False if the supervisor does not own one.
+        kill skips the graceful shutdown and its final save, for children whose data is discarded.
+        """
+        self.expect_exit(redis_id)
+        return self._terminate(redis_id, timeout, kill)
+
+    def abandon(self, redis_id: str, timeout: float = 5.0) -> bool:
+        """
+        Terminate a child whose start failed. A restart in progress stays in charge
+        of rescheduling, so this does not cancel it the way stop() does.
+        """
+        with self._lock:
+            record = self._children.get(redis_id)
+            if record:
+                record.expect_exit = True
+        return self._terminate(redis_id, timeout)
+
+    def _terminate(self, redis_id: str, timeout: float, kill: bool = False) -> bool:
+        with self._lock:
+            record = self._children.get(redis_id)
+            popen = record.popen if record else None
+            exited = record.exited if record else None
+        if popen is None:
+            return False
+        if popen.poll() is None:
+            if kill:
+                popen.kill()
+            else:
+                popen.terminate()
+        if not exited.wait(timeout):
+            popen.kill()
+            exited.wait(timeout)
+        return True
+
+    def forget(self, redis_id: str):
+        self.expect_exit(redis_id)
+        with self._lock:
+            self._children.pop(redis_id, None)
+
+    def owns(self, redis_id: str) -> bool:
+        with self._lock:
+            record = self._children.get(redis_id)
+            return bool(record and record.popen)
+
+    def status(self, redis_id: str) -> Optional[Dict]:
+        with self._lock:
+            record = self._children.get(redis_id)
+            return record.to_dict() if record else None
+
+    def _wait(self, redis_id: str, popen: subprocess.Popen, exited: threading.Event):
+        exit_code = popen.wait()
+        now = datetime.now()
+        delay = None
+        with self._lock:
+            record = self._children.get(redis_id)
+            if record is None or record.popen is not popen:
+                exited.set()
+                return
+            record.popen = None
+            record.last_exit_code = exit_code
+            record.last_exit_at = now
+            if record.restarting:
+                # Exits during a restart attempt are resolved by _restart, counting them
+                # here as well would record the crash twice and start a second timer
+                record.state = 'restarting' if record.expect_exit else 'exited'
+            elif record.expect_exit:
+                record.state = 'stopped'
+            else:
+                delay = self._schedule(record)
+        exited.set()
+
+        if delay is not None:
+            print(f"Redis instance {redis_id} exited with code {exit_code}, restarting in {delay:.1f}s")
+            self._start_timer(redis_id, delay)
+        elif record.state == 'crash_loop':
+            print(f"Redis instance {redis_id} is crash looping, automatic restarts stopped")
+
+    def _schedule(self, record: SupervisedProcess) -> Optional[float]:
+        """Record a crash and return the backoff delay, or None when crash looping. Caller holds the lock."""
+        now = time.monotonic()
+        record.crashes.append(now)
+        while record.crashes and now - record.crashes[0] > self.crash_loop_window:
+            record.crashes.popleft()
+        if len(record.crashes) > self.crash_loop_limit:
+            record.state = 'crash_loop'
+            record.next_restart_at = None
+            return None
+        delay = min(self.max_backoff, self.base_backoff * (2 ** (len(record.crashes) - 1)))
+        record.state = 'backoff'
+        record.next_restart_at = datetime.now() + timedelta(seconds=delay)
+        return delay
+
+    def _start_timer(self, redis_id: str, delay: float):
+        timer = threading.Timer(delay, self._restart, args=(redis_id,))
+        timer.daemon = True
+        timer.start()
+
+    def _restart(self, redis_id: str):
+        with self._lock:
+            record = self._children.get(redis_id)
+            if record is None or record.state != 'backoff':
+                return
+            record.state = 'restarting'
+            record.restarting = True
+            record.restart_count += 1
+
+        try:
+            if self._restart_handler:
+                self._restart_handler(redis_id)
+        except Exception as e:
+            print(f"Failed to restart Redis instance {redis_id}: {e}")
+            with self._lock:
+                record = self._children.get(redis_id)
+                delay = None
+                if record and record.restarting:
+                    record.restarting = False
+                    delay = self._schedule(record)
+            if delay is not None:
+                self._start_timer(redis_id, delay)
+            elif record and record.state == 'crash_loop':
+                print(f"Redis instance {redis_id} is crash looping, automatic restarts stopped")
+            return
+
+        delay = None
+        with self._lock:
+            record = self._children.get(redis_id)
+            if record and record.restarting:
+                record.restarting = False
+                if record.state == 'restarting':
+                    # Handler decided the instance should stay down
+                    record.state = 'stopped'
+                elif record.state == 'exited':
+                    # Came up but died before the attempt finished
+                    delay = self._schedule(record)
+        if delay is not None:
+            self._start_timer(redis_id, delay)
+        elif record and record.state == 'crash_loop':
+            print(f"Redis instance {redis_id} is crash looping, automatic restarts stopped")
@@ -0,0 +1,52 @@
+import threading
+from typing import Dict, Tuple
+import redis
+from domain.redis.domain import RedisInstance
+
+
+class RedisClientPool:
+    """
+    Keeps one connection pool per instance so health checks and metrics
+    reuse authenticated connections instead of reconnecting on every call
+    """
+    def __init__(self, socket_timeout: float = 1.0, max_connections: int = 4):
+        self.socket_timeout = socket_timeout
+        self.max_connections = max_connections
+        self._pools: Dict[str, Tuple[Tuple, redis.ConnectionPool]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, instance: RedisInstance) -> redis.Redis:
+        key = (instance.port, instance.unix_socket, instance.password)
+        with self._lock:
+            entry = self._pools.get(instance.id)
+            if entry is None or entry[0] != key:
+                if entry:
+                    entry[1].disconnect()
+                # Co-located instances are reached over their unix socket when they have one
+                if instance.unix_socket:
+                    kwargs = {'connection_class': redis.UnixDomainSocketConnection, 'path': instance.unix_socket}
+                else:
+                    kwargs = {'host': 'localhost', 'port': instance.port}
+                pool = redis.ConnectionPool(
+                    **kwargs,
+                    password=instance.password,
+                    socket_timeout=self.socket_timeout,
+                    socket_connect_timeout=self.socket_timeout,
+                    max_connections=self.max_connections
+                )
+                entry = (key, pool)
+                self._pools[instance.id] = entry
+        return redis.Redis(connection_pool=entry[1])
+
+    def discard(self, redis_id: str):
+        with self._lock:
+            entry = self._pools.pop(redis_id, None)
+        if entry:
+            entry[1].disconnect()
+
+    def close(self):
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools = {}
+        for _, pool in pools:
+            pool.disconnect()
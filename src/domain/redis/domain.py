@@ -1,26 +1,67 @@
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Dict, Optional
 from enum import Enum
 import string
 import secrets
 import os
+import re
 import shutil
+from domain.redis.profile import render_settings, resolve_profile
+
+# Premium instances get a dedicated core when CPU pinning is enabled
+TIERS = ('standard', 'premium')
 
 class RedisStatus(Enum):
     RUNNING = "running"
     STOPPED = "stopped"
     ERROR = "error"
+    HIBERNATING = "hibernating"
+
+@dataclass
+class InstanceFilter:
+    status: Optional[RedisStatus] = None
+    service_status: Optional[int] = None
+    port_min: Optional[int] = None
+    port_max: Optional[int] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+@dataclass
+class BatchItemResult:
+    redis_id: str
+    ok: bool
+    instance: Optional["RedisInstance"] = None
+    error: Optional[str] = None
 
 @dataclass
 class RedisInstance:
     id: str
-    port: int
+    port: Optional[int]
     config_path: str
     data_dir: str
     created_at: datetime
     status: RedisStatus
     service_status: int = 0
     password: str = ""
+    profile: str = "default"
+    unix_socket: Optional[str] = None
+    tier: str = "standard"
+
+    # Portable sun_path limit: 103 bytes on macOS, Linux allows 107
+    MAX_SOCKET_PATH = 103
+
+    @staticmethod
+    def socket_path(redis_id: str, base_path: str) -> str:
+        return f"{base_path}/{redis_id}/redis.sock"
+
+    @staticmethod
+    def validate_socket(redis_id: str, base_path: str, unix_socket_perm: str):
+        if not re.fullmatch(r'[0-7]{3,4}', unix_socket_perm):
+            raise ValueError(f"Invalid unix_socket_perm: {unix_socket_perm}")
+        path = RedisInstance.socket_path(redis_id, base_path)
+        if len(os.fsencode(path)) > RedisInstance.MAX_SOCKET_PATH:
+            raise ValueError(f"Unix socket path {path} is longer than {RedisInstance.MAX_SOCKET_PATH} bytes")
 
     @staticmethod
     def generate_password(length: int = 32) -> str:
@@ -29,7 +70,15 @@ class RedisInstance:
         return ''.join(secrets.choice(alphabet) for _ in range(length))
 
     @staticmethod
-    def create(redis_id: str, port: int, base_path: str = "C:/NANU/NANU_RSR/ClusterData") -> "RedisInstance":
+    def create(redis_id: str, port: Optional[int], base_path: str = "C:/NANU/NANU_RSR/ClusterData",
+               profile: str = "default", overrides: Optional[Dict] = None, unix_socket: bool = False,
+               unix_socket_perm: str = "700") -> "RedisInstance":
+        """port None together with unix_socket creates a socket-only instance"""
+        settings = resolve_profile(profile, overrides)
+        if unix_socket:
+            RedisInstance.validate_socket(redis_id, base_path, unix_socket_perm)
+        elif port is None:
+            raise ValueError("An instance without a TCP port needs a unix socket")
         try:
             config_path = f"{base_path}/{redis_id}/redis.service.conf"
             data_dir = f"{base_path}/{redis_id}/data"
@@ -39,11 +88,17 @@ class RedisInstance:
             
             os.makedirs(data_dir, exist_ok=True)
             
-            config_content = f"""
-port {port}
-dir {data_dir}
-requirepass {password}
-            """.strip()
+            socket_path = RedisInstance.socket_path(redis_id, base_path) if unix_socket else None
+            socket_lines = [f"unixsocket {socket_path}", f"unixsocketperm {unix_socket_perm}"] if socket_path else []
+            
+            config_content = "\n".join([
+                # port 0 disables the TCP listener
+                f"port {port or 0}",
+                *socket_lines,
+                f"dir {data_dir}",
+                f"requirepass {password}",
+                *render_settings(settings)
+            ])
             
             os.makedirs(os.path.dirname(config_path), exist_ok=True)
             with open(config_path, 'w') as f:
@@ -57,7 +112,9 @@ requirepass {password}
                 created_at=datetime.now(),
                 status=RedisStatus.STOPPED,
                 service_status=0,
-                password=password
+                password=password,
+                profile=profile,
+                unix_socket=socket_path
             )
         except Exception as e:
             raise RuntimeError(f"Failed to create Redis instance: {e}")
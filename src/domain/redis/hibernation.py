@@ -0,0 +1,402 @@
+import os
+import selectors
+import socket
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import redis
+from domain.redis.client import RedisClientPool
+from domain.redis.domain import RedisInstance, RedisStatus
+from domain.metrics.timing import timed, timings
+
+# Commands the manager itself sends, they do not count as tenant activity
+INTERNAL_COMMANDS = {'ping', 'info', 'hello', 'auth', 'client', 'config', 'select', 'bgsave', 'lastsave', 'command'}
+# BGSAVE refusals while another save or an AOF rewrite child is running
+SAVE_BUSY_ERRORS = ('in progress', "can't BGSAVE right now")
+
+
+@dataclass
+class HibernationState:
+    redis_id: str
+    # awake, hibernating, asleep or waking
+    state: str = "awake"
+    command_count: Optional[int] = None
+    last_active: float = field(default_factory=time.monotonic)
+    hibernated_at: Optional[datetime] = None
+    woken_at: Optional[datetime] = None
+    hibernate_count: int = 0
+    wake_count: int = 0
+    last_snapshot_ms: Optional[float] = None
+    last_wake_ms: Optional[float] = None
+    listeners: List[socket.socket] = field(default_factory=list)
+    lock: threading.RLock = field(default_factory=threading.RLock)
+
+    def to_dict(self) -> Dict:
+        return {
+            'state': self.state,
+            'idle_seconds': round(time.monotonic() - self.last_active, 1) if self.state == 'awake' else None,
+            'hibernated_at': self.hibernated_at.isoformat() if self.hibernated_at else None,
+            'woken_at': self.woken_at.isoformat() if self.woken_at else None,
+            'hibernate_count': self.hibernate_count,
+            'wake_count': self.wake_count,
+            'last_snapshot_ms': self.last_snapshot_ms,
+            'last_wake_ms': self.last_wake_ms
+        }
+
+
+class HibernationManager:
+    """
+    Puts idle instances to sleep and wakes them on demand.
+    An instance whose tenant sent no commands for idle_seconds is snapshotted with BGSAVE
+    and stopped, a listener then holds its port and socket. The first connection starts
+    redis-server again through the service and is proxied to it, later clients connect directly.
+    """
+    def __init__(self, service, client_pool: RedisClientPool, idle_seconds: float = 1800.0,
+                 check_interval: float = 30.0, save_timeout: float = 300.0, tiers: Tuple[str, ...] = ('standard',)):
+        self.service = service
+        self.client_pool = client_pool
+        self.idle_seconds = idle_seconds
+        self.check_interval = check_interval
+        self.save_timeout = save_timeout
+        self.tiers = tiers
+        self._states: Dict[str, HibernationState] = {}
+        self._lock = threading.Lock()
+        self._selector = selectors.DefaultSelector()
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(target=self._run, daemon=True),
+            threading.Thread(target=self._serve, daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def restore(self) -> List[str]:
+        """Listen again for instances that were asleep when the manager last exited"""
+        restored = []
+        for instance in self.service.repository.find_all():
+            if instance.status != RedisStatus.HIBERNATING:
+                continue
+            state = self._state(instance.id)
+            with state.lock:
+                try:
+                    self._open_listeners(state, instance)
+                    state.state = 'asleep'
+                    restored.append(instance.id)
+                except OSError as e:
+                    print(f"Failed to listen for hibernated Redis instance {instance.id}: {e}")
+        return restored
+
+    def status(self, redis_id: str) -> Optional[Dict]:
+        with self._lock:
+            state = self._states.get(redis_id)
+        return state.to_dict() if state else None
+
+    def stats(self) -> Dict:
+        with self._lock:
+            states = list(self._states.values())
+        counts = {'awake': 0, 'hibernating': 0, 'asleep': 0, 'waking': 0}
+        for state in states:
+            counts[state.state] += 1
+        return {
+            'idle_seconds': self.idle_seconds,
+            'tiers': list(self.tiers),
+            'instances': counts,
+            'hibernations': sum(state.hibernate_count for state in states),
+            'wakes': sum(state.wake_count for state in states),
+            'wake_ms': timings.snapshot().get('hibernation.wake')
+        }
+
+    @timed('hibernation.check_idle')
+    def check_idle(self) -> List[str]:
+        """Sample command counters and hibernate every instance idle for long enough"""
+        now = time.monotonic()
+        hibernated = []
+        for instance in self.service.repository.find_all():
+            if (instance.status != RedisStatus.RUNNING or instance.service_status != 1
+                    or instance.tier not in self.tiers):
+                continue
+            state = self._state(instance.id)
+            if state.state != 'awake':
+                continue
+            try:
+                count = self._command_count(instance)
+            except Exception:
+                # Unreachable instances are the health monitor's business
+                continue
+            if state.command_count is None or count != state.command_count:
+                state.command_count = count
+                state.last_active = now
+            elif now - state.last_active >= self.idle_seconds and self.hibernate(instance.id):
+                hibernated.append(instance.id)
+        return hibernated
+
+    @timed('hibernation.hibernate')
+    def hibernate(self, redis_id: str) -> bool:
+        state = self._state(redis_id)
+        with state.lock:
+            instance = self.service.repository.find_by_id(redis_id)
+            if not instance or instance.status != RedisStatus.RUNNING or state.state != 'awake':
+                return False
+            state.state = 'hibernating'
+            stopped = False
+            try:
+                started = time.perf_counter()
+                self._snapshot(instance)
+                state.last_snapshot_ms = round((time.perf_counter() - started) * 1000, 3)
+                self.service.hibernate_instance(redis_id)
+                stopped = True
+                self._open_listeners(state, instance)
+            except Exception as e:
+                print(f"Failed to hibernate Redis instance {redis_id}: {e}")
+                state.state = 'awake'
+                state.last_active = time.monotonic()
+                if stopped:
+                    # Nothing holds the port, bring the instance back rather than leave it unreachable
+                    self._start(redis_id)
+                return False
+            state.state = 'asleep'
+            state.hibernated_at = datetime.now()
+            state.hibernate_count += 1
+            print(f"Redis instance {redis_id} hibernated, snapshot took {state.last_snapshot_ms:.0f}ms")
+            return True
+
+    def close_listener(self, redis_id: str):
+        """Called before the service starts, stops or deletes an instance"""
+        with self._lock:
+            state = self._states.get(redis_id)
+        if not state:
+            return
+        with state.lock:
+            self._close_listeners(state)
+            if state.state == 'asleep':
+                state.state = 'awake'
+                state.last_active = time.monotonic()
+                state.command_count = None
+
+    def forget(self, redis_id: str):
+        self.close_listener(redis_id)
+        with self._lock:
+            self._states.pop(redis_id, None)
+
+    def _state(self, redis_id: str) -> HibernationState:
+        with self._lock:
+            state = self._states.get(redis_id)
+            if state is None:
+                state = HibernationState(redis_id=redis_id)
+                self._states[redis_id] = state
+            return state
+
+    def _command_count(self, instance: RedisInstance) -> int:
+        stats = self.client_pool.get(instance).info('commandstats')
+        total = 0
+        for key, value in stats.items():
+            name = key[len('cmdstat_'):].split('|', 1)[0]
+            if key.startswith('cmdstat_') and name not in INTERNAL_COMMANDS:
+                total += int(value['calls'])
+        return total
+
+    def _snapshot(self, instance: RedisInstance):
+        client = self.client_pool.get(instance)
+        deadline = time.monotonic() + self.save_timeout
+        while True:
+            try:
+                client.bgsave()
+                break
+            except redis.exceptions.ResponseError as e:
+                # A save or AOF rewrite started by redis itself is running, wait and take our own
+                if not any(marker in str(e) for marker in SAVE_BUSY_ERRORS):
+                    raise
+                self._wait_for_save(client, deadline, 'rdb_bgsave_in_progress', 'aof_rewrite_in_progress')
+        self._wait_for_save(client, deadline, 'rdb_bgsave_in_progress')
+        status = client.info('persistence').get('rdb_last_bgsave_status')
+        if status != 'ok':
+            raise RuntimeError(f"BGSAVE failed with status {status}")
+
+    @staticmethod
+    def _wait_for_save(client: redis.Redis, deadline: float, *flags: str):
+        while True:
+            info = client.info('persistence')
+            if not any(info.get(flag) for flag in flags):
+                return
+            if time.monotonic() >= deadline:
+                raise RuntimeError("BGSAVE did not finish in time")
+            time.sleep(0.1)
+
+    def _open_listeners(self, state: HibernationState, instance: RedisInstance):
+        listeners = []
+        try:
+            if instance.port:
+                listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                listeners.append(listener)
+                if os.name != 'nt':
+                    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                listener.bind(('', instance.port))
+                listener.listen(128)
+            if instance.unix_socket:
+                if os.path.exists(instance.unix_socket):
+                    os.unlink(instance.unix_socket)
+                listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                listeners.append(listener)
+                listener.bind(instance.unix_socket)
+                os.chmod(instance.unix_socket, self._socket_perm(instance))
+                listener.listen(128)
+            for listener in listeners:
+                listener.setblocking(False)
+                self._selector.register(listener, selectors.EVENT_READ, instance.id)
+        except Exception:
+            state.listeners = listeners
+            self._close_listeners(state)
+            raise
+        state.listeners = listeners
+
+    def _close_listeners(self, state: HibernationState):
+        for listener in state.listeners:
+            try:
+                self._selector.unregister(listener)
+            except (KeyError, ValueError):
+                pass
+            path = listener.getsockname() if listener.family == getattr(socket, 'AF_UNIX', None) else None
+            listener.close()
+            if path and os.path.exists(path):
+                os.unlink(path)
+        state.listeners = []
+
+    @staticmethod
+    def _socket_perm(instance: RedisInstance) -> int:
+        try:
+            with open(instance.config_path, 'r') as f:
+                for line in f:
+                    if line.startswith('unixsocketperm '):
+                        return int(line.split()[1], 8)
+        except (OSError, ValueError):
+            pass
+        return 0o700
+
+    def _serve(self):
+        while not self._stop_event.is_set():
+            if not self._selector.get_map():
+                self._stop_event.wait(0.1)
+                continue
+            try:
+                events = self._selector.select(timeout=0.5)
+            except OSError:
+                continue
+            for key, _ in events:
+                self._on_connect(key.data)
+
+    def _on_connect(self, redis_id: str):
+        started = time.perf_counter()
+        state = self._state(redis_id)
+        held = []
+        with state.lock:
+            if state.state != 'asleep':
+                return
+            # Take everything already queued, the port is released for redis-server next
+            for listener in state.listeners:
+                while True:
+                    try:
+                        conn, _ = listener.accept()
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    conn.setblocking(True)
+                    held.append(conn)
+            self._close_listeners(state)
+            state.state = 'waking'
+        threading.Thread(target=self._wake, args=(redis_id, held, started), daemon=True).start()
+
+    def _wake(self, redis_id: str, held: List[socket.socket], started: float):
+        state = self._state(redis_id)
+        instance = self._start(redis_id)
+        if instance is None:
+            for conn in held:
+                conn.close()
+            with state.lock:
+                instance = self.service.repository.find_by_id(redis_id)
+                if instance and instance.status == RedisStatus.HIBERNATING:
+                    try:
+                        self._open_listeners(state, instance)
+                        state.state = 'asleep'
+                        return
+                    except OSError as e:
+                        print(f"Failed to listen for hibernated Redis instance {redis_id}: {e}")
+                state.state = 'awake'
+            return
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        timings.observe('hibernation.wake', elapsed_ms)
+        with state.lock:
+            state.state = 'awake'
+            state.woken_at = datetime.now()
+            state.wake_count += 1
+            state.last_wake_ms = round(elapsed_ms, 3)
+            state.last_active = time.monotonic()
+            state.command_count = None
+        print(f"Redis instance {redis_id} woke up in {elapsed_ms:.0f}ms")
+
+        for conn in held:
+            threading.Thread(target=self._proxy, args=(conn, instance), daemon=True).start()
+
+    def _start(self, redis_id: str) -> Optional[RedisInstance]:
+        try:
+            return self.service.start_instance(redis_id)
+        except Exception as e:
+            print(f"Failed to wake Redis instance {redis_id}: {e}")
+            return None
+
+    @staticmethod
+    def _proxy(conn: socket.socket, instance: RedisInstance):
+        """Relay a connection accepted while asleep to the started redis-server"""
+        try:
+            if instance.unix_socket:
+                upstream = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                upstream.connect(instance.unix_socket)
+            else:
+                upstream = socket.create_connection(('localhost', instance.port))
+        except OSError as e:
+            print(f"Failed to hand over connection to Redis instance {instance.id}: {e}")
+            conn.close()
+            return
+
+        def pump(source: socket.socket, target: socket.socket):
+            try:
+                while True:
+                    data = source.recv(65536)
+                    if not data:
+                        break
+                    target.sendall(data)
+            except OSError:
+                pass
+            finally:
+                try:
+                    target.shutdown(socket.SHUT_WR)
+                except OSError:
+                    pass
+
+        upstream_thread = threading.Thread(target=pump, args=(conn, upstream), daemon=True)
+        upstream_thread.start()
+        pump(upstream, conn)
+        upstream_thread.join()
+        upstream.close()
+        conn.close()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.check_idle()
+            except Exception as e:
+                print(f"Error checking idle Redis instances: {e}")
+            self._stop_event.wait(self.check_interval)
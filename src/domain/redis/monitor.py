@@ -0,0 +1,183 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+import redis
+from domain.redis.client import RedisClientPool
+from domain.redis.domain import RedisInstance, RedisStatus
+
+
+@dataclass
+class InstanceState:
+    redis_id: str
+    status: RedisStatus
+    checked_at: datetime
+    last_seen: Optional[datetime] = None
+    latency_ms: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.redis_id,
+            'status': self.status.value,
+            'checked_at': self.checked_at.isoformat(),
+            'last_seen': self.last_seen.isoformat() if self.last_seen else None,
+            'latency_ms': self.latency_ms,
+            'error': self.error
+        }
+
+
+class HealthMonitor:
+    """
+    Probes every instance in the background and keeps the latest runtime state in memory.
+    PINGs run concurrently over pooled connections, the repository is only written when
+    a status actually changes and every change is published to subscribers.
+    """
+    def __init__(self, repository, client_pool: RedisClientPool, interval: float = 5.0,
+                 max_workers: int = 16, subscriber_queue_size: int = 1000):
+        self.repository = repository
+        self.client_pool = client_pool
+        self.interval = interval
+        self.max_workers = max_workers
+        self.subscriber_queue_size = subscriber_queue_size
+        self._states: Dict[str, InstanceState] = {}
+        self._subscribers: List[queue.Queue] = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='health')
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def get_state(self, redis_id: str) -> Optional[InstanceState]:
+        with self._lock:
+            return self._states.get(redis_id)
+
+    def get_states(self) -> List[InstanceState]:
+        with self._lock:
+            return list(self._states.values())
+
+    def is_fresh(self, state: InstanceState) -> bool:
+        return (datetime.now() - state.checked_at).total_seconds() < self.interval * 3
+
+    def subscribe(self) -> queue.Queue:
+        subscription = queue.Queue(maxsize=self.subscriber_queue_size)
+        with self._lock:
+            self._subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: queue.Queue):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+
+    def mark(self, redis_id: str, status: RedisStatus):
+        """Record a state change made by the service itself, e.g. an explicit start or stop"""
+        now = datetime.now()
+        self._apply(InstanceState(
+            redis_id=redis_id,
+            status=status,
+            checked_at=now,
+            last_seen=now if status == RedisStatus.RUNNING else None
+        ), persist=False)
+
+    def forget(self, redis_id: str):
+        with self._lock:
+            self._states.pop(redis_id, None)
+        self.client_pool.discard(redis_id)
+
+    def probe_all(self):
+        instances = self.repository.find_all()
+        if self._executor:
+            states = list(self._executor.map(self._probe, instances))
+        else:
+            states = [self._probe(instance) for instance in instances]
+
+        live_ids = {instance.id for instance in instances}
+        with self._lock:
+            for redis_id in [redis_id for redis_id in self._states if redis_id not in live_ids]:
+                del self._states[redis_id]
+
+        for instance, state in zip(instances, states):
+            self._apply(state, persist=state.status != instance.status)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            try:
+                self.probe_all()
+            except Exception as e:
+                print(f"Error probing Redis instances: {e}")
+            self._stop_event.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def _probe(self, instance: RedisInstance) -> InstanceState:
+        now = datetime.now()
+        previous = self.get_state(instance.id)
+        last_seen = previous.last_seen if previous else None
+        if instance.status == RedisStatus.HIBERNATING:
+            # Nothing to ping while asleep, the wake listener holds the port
+            return InstanceState(instance.id, RedisStatus.HIBERNATING, now, last_seen)
+        started = time.perf_counter()
+        try:
+            self.client_pool.get(instance).ping()
+            return InstanceState(
+                redis_id=instance.id,
+                status=RedisStatus.RUNNING,
+                checked_at=now,
+                last_seen=now,
+                latency_ms=round((time.perf_counter() - started) * 1000, 3)
+            )
+        except redis.exceptions.BusyLoadingError as e:
+            # Process is up but still loading its dataset
+            return InstanceState(instance.id, RedisStatus.RUNNING, now, now, None, str(e))
+        except Exception as e:
+            # A down instance that should be running is an error, otherwise it is just stopped
+            status = RedisStatus.ERROR if instance.service_status == 1 else RedisStatus.STOPPED
+            return InstanceState(instance.id, status, now, last_seen, None, str(e))
+
+    def _apply(self, state: InstanceState, persist: bool):
+        with self._lock:
+            previous = self._states.get(state.redis_id)
+            if previous and previous.checked_at > state.checked_at:
+                # The probe started before a newer state was recorded, e.g. by a stop or hibernation
+                return
+            self._states[state.redis_id] = state
+            subscribers = list(self._subscribers)
+
+        if persist:
+            try:
+                self.repository.update_status(state.redis_id, state.status)
+            except Exception as e:
+                print(f"Failed to persist status of Redis instance {state.redis_id}: {e}")
+
+        if previous is None or previous.status != state.status:
+            event = state.to_dict()
+            event['previous_status'] = previous.status.value if previous else None
+            for subscription in subscribers:
+                try:
+                    subscription.put_nowait(event)
+                except queue.Full:
+                    # Slow consumer, drop its oldest event rather than block the monitor
+                    try:
+                        subscription.get_nowait()
+                        subscription.put_nowait(event)
+                    except (queue.Empty, queue.Full):
+                        pass
@@ -0,0 +1,111 @@
+import heapq
+import threading
+from typing import List, Set
+from domain.process.service import ProcessManager
+from domain.metrics.timing import phase, timed
+
+
+class PortAllocator:
+    """
+    In-memory port pool seeded once from the repository.
+    A bitmap tracks ports in use and a min-heap hands out the lowest free port,
+    entries for ports that became used are dropped lazily when popped.
+    """
+    MIN_PORT = 5000
+    MAX_PORT = 9999
+
+    def __init__(self, repository, min_port: int = MIN_PORT, max_port: int = MAX_PORT):
+        if min_port > max_port:
+            raise ValueError(f"Invalid port range {min_port}-{max_port}")
+        self.repository = repository
+        self.min_port = min_port
+        self.max_port = max_port
+        self._lock = threading.Lock()
+        self._used = bytearray(max_port - min_port + 1)
+        self._free: List[int] = []
+        # Free in the bitmap but held by a foreign listener when last tried
+        self._blocked: Set[int] = set()
+        self._seeded = False
+
+    @timed('port.reserve')
+    def reserve(self) -> int:
+        """Atomically hand out a free port, bind testing only the chosen candidate"""
+        with self._lock:
+            with phase('port.seed'):
+                self._seed()
+            retried = False
+            while True:
+                port = self._pop_free()
+                if port is None:
+                    if retried or not self._blocked:
+                        break
+                    # Ports held by outside processes may have been freed since
+                    for blocked in self._blocked:
+                        heapq.heappush(self._free, blocked)
+                    self._blocked = set()
+                    retried = True
+                    continue
+                with phase('port.bind_test'):
+                    in_use = ProcessManager.is_port_in_use(port)
+                if not in_use:
+                    self._used[port - self.min_port] = 1
+                    return port
+                self._blocked.add(port)
+        raise RuntimeError("No available ports in the specified range")
+
+    @timed('port.reserve_many')
+    def reserve_many(self, count: int) -> List[int]:
+        """Reserve count ports in one step, all or nothing"""
+        ports = []
+        try:
+            for _ in range(count):
+                ports.append(self.reserve())
+        except RuntimeError:
+            for port in ports:
+                self.release(port)
+            raise RuntimeError(f"Not enough available ports for {count} instances")
+        return ports
+
+    def release(self, port: int):
+        """Return the port of a deleted instance to the pool"""
+        if not self._in_range(port):
+            return
+        with self._lock:
+            if self._seeded and self._used[port - self.min_port]:
+                self._used[port - self.min_port] = 0
+                heapq.heappush(self._free, port)
+
+    def mark_used(self, port: int):
+        """Record a port taken outside reserve(), e.g. by a filesystem sync"""
+        if not self._in_range(port):
+            return
+        with self._lock:
+            if self._seeded:
+                self._used[port - self.min_port] = 1
+
+    def available(self) -> int:
+        with self._lock:
+            self._seed()
+            blocked = sum(1 for port in self._blocked if not self._used[port - self.min_port])
+            return len(self._used) - sum(self._used) - blocked
+
+    def _pop_free(self):
+        while self._free:
+            port = heapq.heappop(self._free)
+            if not self._used[port - self.min_port]:
+                return port
+        return None
+
+    def _seed(self):
+        if self._seeded:
+            return
+        for port in self.repository.find_all_ports():
+            if self._in_range(port):
+                self._used[port - self.min_port] = 1
+        self._free = [port for port in range(self.min_port, self.max_port + 1)
+                      if not self._used[port - self.min_port]]
+        heapq.heapify(self._free)
+        self._seeded = True
+
+    def _in_range(self, port) -> bool:
+        return port is not None and self.min_port <= port <= self.max_port
@@ -0,0 +1,121 @@
+import re
+from typing import Dict, List, Optional
+
+# Named presets applied on top of the base config written for every instance
+PROFILES: Dict[str, Dict[str, str]] = {
+    'default': {},
+    'cache-only': {
+        'save': '',
+        'appendonly': 'no',
+        # Without a limit (Redis defaults to 0) the policy never evicts, override per instance as needed
+        'maxmemory': '256mb',
+        'maxmemory-policy': 'allkeys-lru',
+    },
+    'durable': {
+        'appendonly': 'yes',
+        'appendfsync': 'everysec',
+        'save': '3600 1 300 100 60 10000',
+        'maxmemory-policy': 'noeviction',
+    },
+    'high-throughput': {
+        'io-threads': '4',
+        'io-threads-do-reads': 'yes',
+        'lazyfree-lazy-eviction': 'yes',
+        'lazyfree-lazy-expire': 'yes',
+        'lazyfree-lazy-server-del': 'yes',
+        'lazyfree-lazy-user-del': 'yes',
+        'appendonly': 'no',
+        'save': '',
+    },
+}
+
+_YES_NO = re.compile(r'^(yes|no)$')
+_INTEGER = re.compile(r'^\d+$')
+_MEMORY = re.compile(r'^\d+(b|k|kb|m|mb|g|gb)?$', re.IGNORECASE)
+_SAVE = re.compile(r'^(\d+ \d+)( \d+ \d+)*$|^$')
+
+# Tunables accepted from the API with the pattern their value must match
+TUNABLES = {
+    'maxmemory': _MEMORY,
+    'maxmemory-policy': re.compile(
+        r'^(noeviction|allkeys-lru|allkeys-lfu|allkeys-random|volatile-lru|volatile-lfu|volatile-random|volatile-ttl)$'
+    ),
+    'maxmemory-samples': _INTEGER,
+    'maxclients': _INTEGER,
+    'timeout': _INTEGER,
+    'tcp-keepalive': _INTEGER,
+    'hz': _INTEGER,
+    'save': _SAVE,
+    'appendonly': _YES_NO,
+    'appendfsync': re.compile(r'^(always|everysec|no)$'),
+    'no-appendfsync-on-rewrite': _YES_NO,
+    'auto-aof-rewrite-percentage': _INTEGER,
+    'auto-aof-rewrite-min-size': _MEMORY,
+    'io-threads': _INTEGER,
+    'io-threads-do-reads': _YES_NO,
+    'lazyfree-lazy-eviction': _YES_NO,
+    'lazyfree-lazy-expire': _YES_NO,
+    'lazyfree-lazy-server-del': _YES_NO,
+    'lazyfree-lazy-user-del': _YES_NO,
+    'lazyfree-lazy-user-flush': _YES_NO,
+    'activedefrag': _YES_NO,
+}
+
+# Only read at startup, changing them needs a restart
+RESTART_REQUIRED = {'io-threads', 'io-threads-do-reads'}
+
+
+def validate_settings(settings: Optional[Dict]) -> Dict[str, str]:
+    """Normalize tunables to strings, raising ValueError for unknown keys or bad values"""
+    normalized = {}
+    for key, value in (settings or {}).items():
+        key = str(key).lower()
+        pattern = TUNABLES.get(key)
+        if pattern is None:
+            raise ValueError(f"Unsupported config setting: {key}")
+        if isinstance(value, bool):
+            value = 'yes' if value else 'no'
+        value = str(value).strip()
+        if not pattern.match(value):
+            raise ValueError(f"Invalid value for {key}: {value!r}")
+        normalized[key] = value
+    return normalized
+
+
+def resolve_profile(profile: str, overrides: Optional[Dict] = None) -> Dict[str, str]:
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown profile: {profile}")
+    settings = dict(PROFILES[profile])
+    settings.update(validate_settings(overrides))
+    return settings
+
+
+def render_settings(settings: Dict[str, str]) -> List[str]:
+    return [f'{key} ""' if value == '' else f'{key} {value}' for key, value in settings.items()]
+
+
+def apply_to_config(content: str, settings: Dict[str, str]) -> str:
+    """Replace existing directives for the given keys, appending the ones not present yet"""
+    remaining = dict(settings)
+    lines = []
+    for line in content.splitlines():
+        parts = line.split(None, 1)
+        key = parts[0].lower() if parts else ''
+        if key in settings:
+            if key in remaining:
+                lines.extend(render_settings({key: remaining.pop(key)}))
+            # Drop repeated directives such as multiple save lines
+            continue
+        lines.append(line)
+    lines.extend(render_settings(remaining))
+    return '\n'.join(lines)
+
+
+def read_settings(content: str) -> Dict[str, str]:
+    settings = {}
+    for line in content.splitlines():
+        parts = line.split(None, 1)
+        if len(parts) == 2 and parts[0].lower() in TUNABLES:
+            value = parts[1].strip()
+            settings[parts[0].lower()] = '' if value == '""' else value
+    return settings
@@ -0,0 +1,74 @@
+import subprocess
+import time
+from typing import Optional
+import redis
+
+
+class ReadinessProbe:
+    """
+    Polls a freshly spawned redis-server until it answers PING.
+    The answer only counts when INFO reports the pid of the spawned process.
+    Retries start fast and back off exponentially up to max_delay.
+    """
+    def __init__(self, timeout: float = 30.0, loading_timeout: float = 600.0,
+                 initial_delay: float = 0.01, max_delay: float = 0.5, backoff: float = 2.0):
+        self.timeout = timeout
+        self.loading_timeout = loading_timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+
+    def wait(self, process: subprocess.Popen, port: Optional[int], password: str,
+             unix_socket: Optional[str] = None) -> float:
+        """
+        Block until the server is ready and return the startup time in seconds.
+        Raises RuntimeError if the process exits or the deadline passes.
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        delay = self.initial_delay
+        last_error = None
+
+        address = {'unix_socket_path': unix_socket} if unix_socket else {'host': 'localhost', 'port': port}
+        client = redis.Redis(
+            **address,
+            password=password,
+            socket_connect_timeout=1,
+            socket_timeout=1
+        )
+        try:
+            while True:
+                exit_code = process.poll()
+                if exit_code is not None:
+                    raise RuntimeError(f"redis-server exited with code {exit_code} before becoming ready")
+
+                try:
+                    client.ping()
+                    # Anything could be answering on the address, make sure it is our child
+                    server_pid = client.info('server').get('process_id')
+                    exit_code = process.poll()
+                    if exit_code is not None:
+                        raise RuntimeError(f"redis-server exited with code {exit_code} before becoming ready")
+                    if server_pid != process.pid:
+                        raise RuntimeError(
+                            f"{unix_socket or f'port {port}'} is served by pid {server_pid}, not the spawned pid {process.pid}"
+                        )
+                    return time.monotonic() - started
+                except redis.exceptions.AuthenticationError:
+                    raise
+                except redis.exceptions.BusyLoadingError as e:
+                    # Dataset is still being loaded from disk, allow the longer deadline
+                    deadline = started + max(self.timeout, self.loading_timeout)
+                    last_error = e
+                except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+                    last_error = e
+
+                now = time.monotonic()
+                if now >= deadline:
+                    raise RuntimeError(
+                        f"redis-server on {unix_socket or f'port {port}'} not ready after {now - started:.1f}s: {last_error}"
+                    )
+                time.sleep(min(delay, deadline - now))
+                delay = min(delay * self.backoff, self.max_delay)
+        finally:
+            client.close()
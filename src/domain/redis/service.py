@@ -1,186 +1,576 @@
 import subprocess
+import tempfile
+import threading
 import redis
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, Optional, Tuple
 import os
-from domain.redis.domain import RedisInstance, RedisStatus
+import shutil
+import psutil
+from domain.redis.domain import TIERS, BatchItemResult, InstanceFilter, RedisInstance, RedisStatus
+from domain.redis.readiness import ReadinessProbe
+from domain.redis.port import PortAllocator
+from domain.redis.monitor import HealthMonitor
+from domain.redis.client import RedisClientPool
+from domain.redis.profile import RESTART_REQUIRED, apply_to_config, read_settings, resolve_profile, validate_settings
+from domain.redis.sync import FilesystemSync, SyncResult
+from domain.redis.startup import StartupEngine, StartupReport, ResourceGate
+from domain.redis.trash import TrashReclaimer
+from domain.process.domain import ProcessEntry
 from domain.process.service import ProcessManager
-import time
-from datetime import datetime
+from domain.process.supervisor import ProcessSupervisor
+from domain.process.affinity import CpuPlacer
+from domain.metrics.timing import phase, timed
 
 
-redis_path = r"C:\redis-server.exe"
-BASE_PATH = "C:/Temp/RedisData"
-
-class PortManager:
-    MIN_PORT = 5000
-    MAX_PORT = 9999
-    
-    @staticmethod
-    def get_next_available_port(repository) -> int:
-        used_ports = {instance.port for instance in repository.find_all()}
-        
-        for port in range(PortManager.MIN_PORT, PortManager.MAX_PORT + 1):
-            if port not in used_ports and not ProcessManager.is_port_in_use(port):
-                return port
-        raise RuntimeError("No available ports in the specified range")
+redis_path = os.environ.get("NANU_REDIS_SERVER", r"C:\redis-server.exe")
+BASE_PATH = os.environ.get("NANU_BASE_PATH", "C:/Temp/RedisData")
 
 class RedisService:
-    def __init__(self, repository):
+    def __init__(self, repository, process_repository, readiness_probe: Optional[ReadinessProbe] = None,
+                 port_allocator: Optional[PortAllocator] = None, health_monitor: Optional[HealthMonitor] = None,
+                 base_path: Optional[str] = None, redis_command: Optional[List[str]] = None,
+                 client_pool: Optional[RedisClientPool] = None, supervisor: Optional[ProcessSupervisor] = None,
+                 cpu_placer: Optional[CpuPlacer] = None, trash_rate_limit: float = 64 * 1024 * 1024):
         self.repository = repository
+        self.client_pool = client_pool or RedisClientPool()
+        self.base_path = base_path or BASE_PATH
+        self.redis_command = redis_command or [redis_path]
+        self.process_repository = process_repository
+        self.port_allocator = port_allocator or PortAllocator(repository)
+        # Held while instance directories and rows change together, shared with the filesystem sync
+        self._fs_lock = threading.RLock()
+        self._config_locks: Dict[str, threading.Lock] = {}
+        self._config_locks_guard = threading.Lock()
+        self.filesystem_sync = FilesystemSync(repository, self.port_allocator, self.base_path, self._fs_lock)
+        self.readiness_probe = readiness_probe or ReadinessProbe()
+        self.startup_times: Dict[str, float] = {}
+        self.health_monitor = health_monitor
+        self.supervisor = supervisor or ProcessSupervisor()
+        self.supervisor.set_restart_handler(self._restart_instance)
+        self.cpu_placer = cpu_placer
+        # Deleted instance directories go here, a dot directory the filesystem sync skips.
+        # It must sit under base_path, a rename across filesystems would fail
+        self.trash = TrashReclaimer(f"{self.base_path}/.trash", rate_limit=trash_rate_limit)
+        # Set to a HibernationManager when idle hibernation is enabled
+        self.hibernation = None
+
+    @timed('service.find_process')
+    def find_process(self, instance: RedisInstance) -> Optional[psutil.Process]:
+        """
+        Look up the redis-server process of an instance through the PID registry.
+        Falls back to a full process scan only when the registered entry is stale.
+        """
+        entry = self.process_repository.find(instance.id)
+        if entry:
+            process = ProcessManager.get_process(entry.pid, entry.create_time)
+            if process:
+                return process
+        elif instance.status != RedisStatus.RUNNING:
+            return None
+
+        # Socket-only instances have no TCP listener to scan for
+        process = ProcessManager.find_redis_process(instance.port) if instance.port else None
+        if process:
+            self._register_process(instance.id, process.pid)
+        elif entry:
+            self.process_repository.delete(instance.id)
+        return process
 
+    def _register_process(self, redis_id: str, pid: int):
+        create_time = ProcessManager.get_create_time(pid)
+        if create_time is not None:
+            self.process_repository.save(ProcessEntry(redis_id=redis_id, pid=pid, create_time=create_time))
+
+    @timed('service.start_instance')
     def start_instance(self, redis_id: str) -> RedisInstance:
         instance = self.repository.find_by_id(redis_id)
         if not instance:
             raise ValueError(f"Redis instance {redis_id} not found")
+        if self.supervisor.owns(redis_id):
+            # Already running under the supervisor, starting is a no-op
+            return instance
+        existing = self.find_process(instance)
+        if existing:
+            # Left running by an earlier agent run. It is not our child so the supervisor
+            # cannot wait on it; adopt it as is instead of spawning a duplicate on its port
+            return self._adopt_process(instance, existing)
+        if self.hibernation:
+            # A sleeping instance's port is held by its wake listener
+            self.hibernation.close_listener(redis_id)
         
+        process = None
         try:
-            process = subprocess.Popen([redis_path, instance.config_path])
-            time.sleep(2)
-            
-            # Test connection with password
-            client = redis.Redis(
-                host='localhost', 
-                port=instance.port,
-                password=instance.password
-            )
-            client.ping()
+            with phase('start.spawn'):
+                process = subprocess.Popen([*self.redis_command, instance.config_path])
+                self.supervisor.attach(redis_id, process)
+                self._register_process(instance.id, process.pid)
+            if self.cpu_placer:
+                # Every spawn is pinned again, restarts keep the cores of the instance
+                with phase('start.pin'):
+                    self.cpu_placer.apply(redis_id, process.pid, instance.tier, self._thread_count(instance))
+
+            # Wait until the server answers PING with the instance password
+            with phase('start.readiness'):
+                self.startup_times[redis_id] = self.readiness_probe.wait(
+                    process, instance.port, instance.password, instance.unix_socket)
+            print(f"Redis instance {redis_id} ready in {self.startup_times[redis_id]:.3f}s")
             
             instance.status = RedisStatus.RUNNING
             instance.service_status = 1
             self.repository.save(instance)
+            if self.health_monitor:
+                self.health_monitor.mark(redis_id, RedisStatus.RUNNING)
             
             return instance
         except Exception as e:
+            if process and not self.supervisor.abandon(redis_id) and process.poll() is None:
+                process.terminate()
+            if self.cpu_placer and instance.service_status != 1:
+                # No restart will follow, free the cores for other instances
+                self.cpu_placer.release(redis_id)
+            self.process_repository.delete(redis_id)
             raise RuntimeError(f"Failed to start Redis instance {redis_id}: {e}")
 
-    def sync_with_filesystem(self):
-        if os.path.exists(BASE_PATH):
-            fs_instance_ids = {d for d in os.listdir(BASE_PATH) 
-                             if os.path.isdir(os.path.join(BASE_PATH, d))}
-        else:
-            fs_instance_ids = set()
-
-        db_instances = self.repository.find_all()
-        db_instance_ids = {instance.id for instance in db_instances}
-
-        for instance in db_instances:
-            if instance.id not in fs_instance_ids:
-                self.repository.delete(instance.id)
-
-        for fs_id in fs_instance_ids:
-            config_path = os.path.join(BASE_PATH, fs_id, "redis.service.conf")
-            if os.path.exists(config_path):
-                current_instance = self.repository.find_by_id(fs_id)
-                
-                port = None
-                password = None
-                with open(config_path, 'r') as f:
-                    for line in f:
-                        if line.startswith('port'):
-                            port = int(line.split()[1])
-                        elif line.startswith('requirepass'):
-                            password = line.split(None, 1)[1].strip()
-
-                if port:
-                    if not current_instance:
-                        instance = RedisInstance(
-                            id=fs_id,
-                            port=port,
-                            config_path=config_path,
-                            data_dir=os.path.join(BASE_PATH, fs_id, "data"),
-                            created_at=datetime.fromtimestamp(os.path.getctime(config_path)),
-                            status=RedisStatus.STOPPED,
-                            service_status=0,
-                            password=password
-                        )
-                        self.repository.save(instance)
-
-    def create_instance(self, redis_id: str) -> RedisInstance:
-        if RedisInstance.exists_on_filesystem(redis_id):
+    def _adopt_process(self, instance: RedisInstance, process: psutil.Process) -> RedisInstance:
+        print(f"Redis instance {instance.id} already running as pid {process.pid}, adopting it")
+        self._register_process(instance.id, process.pid)
+        if self.cpu_placer:
+            self.cpu_placer.apply(instance.id, process.pid, instance.tier, self._thread_count(instance))
+        instance.status = RedisStatus.RUNNING
+        instance.service_status = 1
+        self.repository.save(instance)
+        if self.health_monitor:
+            self.health_monitor.mark(instance.id, RedisStatus.RUNNING)
+        return instance
+
+    @staticmethod
+    def _thread_count(instance: RedisInstance) -> int:
+        try:
+            with open(instance.config_path, 'r') as f:
+                threads = read_settings(f.read()).get('io-threads')
+            return int(threads) if threads else 1
+        except (OSError, ValueError):
+            return 1
+
+    def _restart_instance(self, redis_id: str):
+        """Supervisor restart handler, only instances meant to be running are restarted"""
+        instance = self.repository.find_by_id(redis_id)
+        if not instance or instance.service_status != 1:
+            return
+        self.start_instance(redis_id)
+
+    @timed('service.sync_with_filesystem')
+    def sync_with_filesystem(self) -> SyncResult:
+        return self.filesystem_sync.sync()
+
+    @timed('service.create_instance')
+    def create_instance(self, redis_id: str, profile: str = "default", overrides: Optional[Dict] = None,
+                        unix_socket: bool = False, tcp: bool = True, unix_socket_perm: str = "700",
+                        tier: str = "standard") -> RedisInstance:
+        """
+        unix_socket adds a socket next to the config for co-located clients,
+        tcp=False makes the instance socket-only and no port is reserved
+        """
+        if RedisInstance.exists_on_filesystem(redis_id, self.base_path):
             raise RuntimeError(f"Redis instance {redis_id} already exists")
+        # Reject unknown profiles, bad tunables and socket options before reserving anything
+        resolve_profile(profile, overrides)
+        self._validate_transport(redis_id, unix_socket, tcp, unix_socket_perm)
+        self._validate_tier(tier)
         
+        port = None
         try:
-            port = PortManager.get_next_available_port(self.repository)
-            instance = RedisInstance.create(redis_id, port)
-            self.repository.save(instance)
+            if tcp:
+                port = self.port_allocator.reserve()
+            with self._fs_lock:
+                with phase('create.config'):
+                    instance = RedisInstance.create(redis_id, port, self.base_path, profile, overrides,
+                                                    unix_socket, unix_socket_perm)
+                instance.tier = tier
+                self.repository.save(instance)
             return instance
         except Exception as e:
             print(e)
+            if port is not None:
+                self.port_allocator.release(port)
             try:
-                instance_path = f"{BASE_PATH}/{redis_id}"
+                instance_path = f"{self.base_path}/{redis_id}"
                 if os.path.exists(instance_path):
                     shutil.rmtree(instance_path)
             except:
                 pass
             raise RuntimeError(f"Failed to create Redis instance: {e}")
 
+    @timed('service.create_instances')
+    def create_instances(self, redis_ids: List[str], max_workers: int = 8, profile: str = "default",
+                         overrides: Optional[Dict] = None, unix_socket: bool = False, tcp: bool = True,
+                         unix_socket_perm: str = "700", tier: str = "standard") -> List[BatchItemResult]:
+        """
+        Create many instances at once: ports are reserved in one step, configs are
+        written in parallel and all rows are persisted in a single transaction.
+        A failing item does not abort the others.
+        """
+        resolve_profile(profile, overrides)
+        self._validate_tier(tier)
+        results: Dict[str, BatchItemResult] = {}
+        valid_ids = []
+        for redis_id in redis_ids:
+            if not redis_id or redis_id in results or redis_id in valid_ids:
+                results.setdefault(redis_id, BatchItemResult(redis_id, False, error="Missing or duplicate redis_id"))
+            elif RedisInstance.exists_on_filesystem(redis_id, self.base_path) or self.repository.exists(redis_id):
+                results[redis_id] = BatchItemResult(redis_id, False, error=f"Redis instance {redis_id} already exists")
+            else:
+                try:
+                    self._validate_transport(redis_id, unix_socket, tcp, unix_socket_perm)
+                    valid_ids.append(redis_id)
+                except ValueError as e:
+                    results[redis_id] = BatchItemResult(redis_id, False, error=str(e))
+
+        if valid_ids:
+            try:
+                ports = self.port_allocator.reserve_many(len(valid_ids)) if tcp else [None] * len(valid_ids)
+            except RuntimeError as e:
+                ports = []
+                for redis_id in valid_ids:
+                    results[redis_id] = BatchItemResult(redis_id, False, error=str(e))
+
+            created = []
+            # Configs and rows appear together for the filesystem sync
+            with self._fs_lock:
+                if ports:
+                    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+                        futures = [(redis_id, port, pool.submit(RedisInstance.create, redis_id, port, self.base_path, profile, overrides,
+                                                unix_socket, unix_socket_perm))
+                                   for redis_id, port in zip(valid_ids, ports)]
+                    for redis_id, port, future in futures:
+                        try:
+                            instance = future.result()
+                            instance.tier = tier
+                            created.append(instance)
+                        except Exception as e:
+                            self._discard_created(redis_id, port)
+                            results[redis_id] = BatchItemResult(redis_id, False, error=str(e))
+
+                try:
+                    self.repository.save_many(created)
+                    for instance in created:
+                        results[instance.id] = BatchItemResult(instance.id, True, instance=instance)
+                except Exception as e:
+                    for instance in created:
+                        self._discard_created(instance.id, instance.port)
+                        results[instance.id] = BatchItemResult(instance.id, False, error=f"Failed to persist instance: {e}")
+
+        return [results[redis_id] for redis_id in dict.fromkeys(redis_ids)]
+
+    def _validate_transport(self, redis_id: str, unix_socket: bool, tcp: bool, unix_socket_perm: str):
+        if not tcp and not unix_socket:
+            raise ValueError("A socket-only instance needs unix_socket enabled")
+        if unix_socket:
+            RedisInstance.validate_socket(redis_id, self.base_path, unix_socket_perm)
+
+    @staticmethod
+    def _validate_tier(tier: str):
+        if tier not in TIERS:
+            raise ValueError(f"Unknown tier: {tier}")
+
+    def _discard_created(self, redis_id: str, port: Optional[int]):
+        self.port_allocator.release(port)
+        try:
+            instance_path = f"{self.base_path}/{redis_id}"
+            if os.path.exists(instance_path):
+                shutil.rmtree(instance_path)
+        except OSError:
+            pass
+
+    @timed('service.delete_instance')
     def delete_instance(self, redis_id: str):
         instance = self.repository.find_by_id(redis_id)
         if not instance:
             raise ValueError(f"Redis instance {redis_id} not found")
 
         try:
-            # Stop the instance if it's running
-            process = ProcessManager.find_redis_process(instance.port)
-            if process:
-                process.terminate()
-                process.wait(timeout=5)
+            # The data is discarded, kill instead of waiting for a final save
+            with phase('delete.terminate'):
+                self._terminate(instance, kill=True)
+            self.supervisor.forget(redis_id)
+            if self.hibernation:
+                self.hibernation.forget(redis_id)
+            if self.cpu_placer:
+                self.cpu_placer.release(redis_id)
 
-            # Delete files
-            instance.delete()
-            
-            # Remove from database
-            self.repository.delete(redis_id)
+            with self._fs_lock:
+                # Only a rename here, the trash reclaimer frees the space in the background
+                with phase('delete.files'):
+                    self._trash_files(instance)
+
+                # Remove from database
+                with self.repository.transaction():
+                    self.process_repository.delete(redis_id)
+                    self.repository.delete(redis_id)
+            self.port_allocator.release(instance.port)
+            if self.health_monitor:
+                self.health_monitor.forget(redis_id)
         except Exception as e:
             raise RuntimeError(f"Failed to delete Redis instance: {e}")
 
+    @timed('service.stop_instance')
     def stop_instance(self, redis_id: str) -> RedisInstance:
         instance = self.repository.find_by_id(redis_id)
         if not instance:
             raise ValueError(f"Redis instance {redis_id} not found")
 
         try:
-            process = ProcessManager.find_redis_process(instance.port)
-            if process:
-                process.terminate()
-                process.wait(timeout=5)
+            with phase('stop.terminate'):
+                self._terminate(instance)
+            
+            if self.cpu_placer:
+                self.cpu_placer.release(redis_id)
             
             instance.status = RedisStatus.STOPPED
             instance.service_status = 0
-            self.repository.save(instance)
+            with self.repository.transaction():
+                self.process_repository.delete(redis_id)
+                self.repository.save(instance)
+            if self.health_monitor:
+                self.health_monitor.mark(redis_id, RedisStatus.STOPPED)
             
             return instance
         except Exception as e:
             raise RuntimeError(f"Failed to stop Redis instance {redis_id}: {e}")
 
+    @timed('service.hibernate_instance')
+    def hibernate_instance(self, redis_id: str) -> RedisInstance:
+        """
+        Stop the process of an idle instance but keep it enabled,
+        the hibernation manager starts it again on the next connection
+        """
+        instance = self.repository.find_by_id(redis_id)
+        if not instance:
+            raise ValueError(f"Redis instance {redis_id} not found")
+
+        try:
+            with phase('hibernate.terminate'):
+                self._terminate(instance)
+            if self.cpu_placer:
+                self.cpu_placer.release(redis_id)
+
+            instance.status = RedisStatus.HIBERNATING
+            with self.repository.transaction():
+                self.process_repository.delete(redis_id)
+                self.repository.save(instance)
+            if self.health_monitor:
+                self.health_monitor.mark(redis_id, RedisStatus.HIBERNATING)
+            return instance
+        except Exception as e:
+            raise RuntimeError(f"Failed to hibernate Redis instance {redis_id}: {e}")
+
+    def _terminate(self, instance: RedisInstance, kill: bool = False):
+        if self.hibernation:
+            self.hibernation.close_listener(instance.id)
+        if not self.supervisor.stop(instance.id, kill=kill):
+            process = self.find_process(instance)
+            if process:
+                if kill:
+                    process.kill()
+                else:
+                    process.terminate()
+                process.wait(timeout=5)
+
+    def _trash_files(self, instance: RedisInstance):
+        try:
+            self.trash.move(os.path.dirname(instance.config_path), instance.id)
+        except OSError as e:
+            # Windows refuses to rename directories with files still open
+            print(f"Failed to move Redis instance {instance.id} to trash, deleting inline: {e}")
+            instance.delete()
+
+    @timed('service.get_instance_status')
     def get_instance_status(self, redis_id: str) -> Dict:
         instance = self.repository.find_by_id(redis_id)
         if not instance:
             raise ValueError(f"Redis instance {redis_id} not found")
 
-        process = ProcessManager.find_redis_process(instance.port)
+        state = self.health_monitor.get_state(redis_id) if self.health_monitor else None
+        if state and self.health_monitor.is_fresh(state):
+            # Served from the monitor's state table, no process lookup needed
+            running = state.status == RedisStatus.RUNNING
+            entry = self.process_repository.find(redis_id) if running else None
+            pid = entry.pid if entry else None
+            health = state.to_dict()
+        else:
+            process = self.find_process(instance)
+            running = process is not None
+            pid = process.pid if process else None
+            health = None
+
         return {
             'id': instance.id,
-            'running': process is not None,
-            'pid': process.pid if process else None,
+            'running': running,
+            'pid': pid,
             'port': instance.port,
+            'unix_socket': instance.unix_socket,
             'config_path': instance.config_path,
             'data_dir': instance.data_dir,
             'created_at': instance.created_at.isoformat(),
             'service_status': instance.service_status,
             'status': instance.status.value,
-            'exists_on_filesystem': RedisInstance.exists_on_filesystem(redis_id)
+            'last_startup_seconds': self.startup_times.get(redis_id),
+            'exists_on_filesystem': RedisInstance.exists_on_filesystem(redis_id, self.base_path),
+            'health': health,
+            'supervisor': self.supervisor.status(redis_id),
+            'tier': instance.tier,
+            'cpu_affinity': self.cpu_placer.get(redis_id) if self.cpu_placer else None,
+            'hibernation': self.hibernation.status(redis_id) if self.hibernation else None
         }
 
-    def start_all_instances(self):
-        """Start all Redis instances with service_status=1"""
-        instances = self.repository.find_all()
-        for instance in instances:
-            if instance.service_status == 1:
+    @timed('service.get_fleet_status')
+    def get_fleet_status(self) -> List[Dict]:
+        """Runtime status of every instance from one process table snapshot"""
+        listeners = ProcessManager.snapshot_listeners()
+        ProcessManager.prune_usage_handles({proc.pid for proc in listeners.values()})
+        try:
+            with os.scandir(self.base_path) as entries:
+                fs_ids = {entry.name for entry in entries if entry.is_dir()}
+        except FileNotFoundError:
+            fs_ids = set()
+
+        statuses = []
+        for instance in self.repository.find_all():
+            # Socket-only instances are not in the listener table, use the PID registry
+            process = listeners.get(instance.port) if instance.port else self.find_process(instance)
+            usage = ProcessManager.get_usage(process) if process else {'rss_bytes': None, 'cpu_percent': None}
+            statuses.append({
+                'id': instance.id,
+                'running': process is not None,
+                'pid': process.pid if process else None,
+                'port': instance.port,
+                'unix_socket': instance.unix_socket,
+                'service_status': instance.service_status,
+                'status': instance.status.value,
+                'rss_bytes': usage['rss_bytes'],
+                'cpu_percent': usage['cpu_percent'],
+                'exists_on_filesystem': instance.id in fs_ids,
+                'supervisor': self.supervisor.status(instance.id),
+                'tier': instance.tier,
+                'cpu_affinity': self.cpu_placer.get(instance.id) if self.cpu_placer else None
+            })
+        return statuses
+
+    @timed('service.start_all_instances')
+    def start_all_instances(self, max_workers: int = 8, order: Optional[str] = None,
+                            priorities: Optional[Dict[str, int]] = None,
+                            resource_gate: Optional[ResourceGate] = None) -> StartupReport:
+        """Start all Redis instances with service_status=1 in parallel"""
+        # Hibernated instances stay asleep until a client connects, unless hibernation was turned off
+        instances = [instance for instance in self.repository.find_all()
+                     if instance.service_status == 1
+                     and not (self.hibernation and instance.status == RedisStatus.HIBERNATING)]
+        engine = StartupEngine(self, max_workers, order, priorities, resource_gate)
+        report = engine.run(instances)
+        for redis_id, error in report.failed.items():
+            print(f"Failed to auto-start Redis instance {redis_id}: {error}")
+        return report
+
+    def get_config(self, redis_id: str) -> Dict:
+        instance = self.repository.find_by_id(redis_id)
+        if not instance:
+            raise ValueError(f"Redis instance {redis_id} not found")
+        with open(instance.config_path, 'r') as f:
+            settings = read_settings(f.read())
+        return {'id': instance.id, 'profile': instance.profile, 'settings': settings}
+
+    @timed('service.update_config')
+    def update_config(self, redis_id: str, settings: Dict) -> Dict:
+        """
+        Apply tunables to a running server with CONFIG SET, without a restart where
+        Redis allows it, and persist the accepted ones to the instance config.
+        Settings the server rejects are reported in errors and not written,
+        so the file never holds values the live server refused.
+        """
+        instance = self.repository.find_by_id(redis_id)
+        if not instance:
+            raise ValueError(f"Redis instance {redis_id} not found")
+        settings = validate_settings(settings)
+        if not settings:
+            raise ValueError("No settings given")
+
+        with self._config_lock(redis_id):
+            applied = []
+            restart_required = []
+            errors = {}
+            previous = {}
+            running = instance.status == RedisStatus.RUNNING
+            if running:
+                client = self.client_pool.get(instance)
+                for key, value in settings.items():
+                    if key in RESTART_REQUIRED:
+                        restart_required.append(key)
+                        continue
+                    try:
+                        previous.update(client.config_get(key))
+                        client.config_set(key, value)
+                        applied.append(key)
+                    except redis.exceptions.RedisError as e:
+                        errors[key] = str(e)
+            accepted = {key: value for key, value in settings.items() if key not in errors}
+
+            with open(instance.config_path, 'r') as f:
+                content = f.read()
+            if accepted:
+                content = apply_to_config(content, accepted)
                 try:
-                    self.start_instance(instance.id)
-                except Exception as e:
-                    print(f"Failed to auto-start Redis instance {instance.id}: {e}")
+                    self._write_config(instance.config_path, content)
+                except OSError:
+                    # Put the live server back in line with the file it will restart from
+                    for key in applied:
+                        if key in previous:
+                            try:
+                                client.config_set(key, previous[key])
+                            except redis.exceptions.RedisError as e:
+                                print(f"Failed to roll back {key} on Redis instance {redis_id}: {e}")
+                    raise
+
+        return {
+            'id': instance.id,
+            'running': running,
+            'settings': read_settings(content),
+            'applied': applied,
+            'restart_required': restart_required,
+            'errors': errors
+        }
+
+    def _config_lock(self, redis_id: str) -> threading.Lock:
+        """One lock per instance so concurrent updates do not interleave"""
+        with self._config_locks_guard:
+            lock = self._config_locks.get(redis_id)
+            if lock is None:
+                lock = self._config_locks[redis_id] = threading.Lock()
+            return lock
+
+    @staticmethod
+    def _write_config(config_path: str, content: str):
+        # Unique temp file in the same directory, os.replace is then atomic
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(config_path),
+                                         prefix=os.path.basename(config_path) + '.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(content)
+            os.replace(temp_path, config_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
 
     def get_all_instances(self) -> List[RedisInstance]:
-        return self.repository.find_all()
\ No newline at end of file
+        return self.repository.find_all()
+
+    def iter_instances(self, filters: InstanceFilter, fields: List[str], after_id: Optional[str] = None,
+                       limit: Optional[int] = None) -> Iterator[Tuple[str, Dict]]:
+        """Stream (id, projected fields) pairs straight from the database, ordered by id"""
+        columns = list(dict.fromkeys(['id', *fields]))
+        for row in self.repository.iter_rows(filters, columns, after_id, limit):
+            values = dict(zip(columns, row))
+            yield values['id'], {field: values[field] for field in fields}
\ No newline at end of file
@@ -0,0 +1,159 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import psutil
+from domain.redis.domain import RedisInstance
+
+
+@dataclass
+class StartupReport:
+    started: List[str] = field(default_factory=list)
+    failed: Dict[str, str] = field(default_factory=dict)
+    startup_times: Dict[str, float] = field(default_factory=dict)
+    throttled_seconds: float = 0.0
+    elapsed: float = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'started': self.started,
+            'failed': self.failed,
+            'startup_times': self.startup_times,
+            'throttled_seconds': round(self.throttled_seconds, 3),
+            'elapsed': round(self.elapsed, 3)
+        }
+
+
+class ResourceGate:
+    """
+    Holds back new launches while available memory or disk I/O headroom is low,
+    so parallel RDB loads do not thrash the host
+    """
+    def __init__(self, min_available_memory_mb: int = 512, max_disk_io_mb_per_sec: Optional[float] = 200.0,
+                 poll_interval: float = 0.5, max_wait: float = 60.0):
+        self.min_available_memory_mb = min_available_memory_mb
+        self.max_disk_io_mb_per_sec = max_disk_io_mb_per_sec
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self.exhausted = False
+        self._waited = 0.0
+        self._last_io = None
+
+    def has_headroom(self) -> bool:
+        available_mb = psutil.virtual_memory().available / (1024 * 1024)
+        if available_mb < self.min_available_memory_mb:
+            return False
+        if self.max_disk_io_mb_per_sec is not None:
+            rate = self._disk_io_rate()
+            if rate is not None and rate > self.max_disk_io_mb_per_sec:
+                return False
+        return True
+
+    def wait_for_headroom(self) -> float:
+        """
+        Wait until there is headroom and return the time spent waiting.
+        max_wait is the budget for all launches together, once it is spent the
+        gate stops waiting so a host that stays busy cannot stall boot for hours.
+        """
+        if self.exhausted:
+            return 0.0
+        started = time.monotonic()
+        while not self.has_headroom():
+            if self._waited + time.monotonic() - started >= self.max_wait:
+                self.exhausted = True
+                print(f"Resource headroom still low after {self.max_wait:.1f}s of waiting, no longer gating launches")
+                break
+            time.sleep(self.poll_interval)
+        waited = time.monotonic() - started
+        self._waited += waited
+        return waited
+
+    def _disk_io_rate(self) -> Optional[float]:
+        counters = psutil.disk_io_counters()
+        if counters is None:
+            return None
+        now = time.monotonic()
+        total = counters.read_bytes + counters.write_bytes
+        last = self._last_io
+        self._last_io = (now, total)
+        if last is None or now <= last[0]:
+            return None
+        return (total - last[1]) / (now - last[0]) / (1024 * 1024)
+
+
+class StartupEngine:
+    """
+    Starts many instances on a bounded worker pool.
+    order: None keeps repository order, 'data_size' starts the largest data dir first.
+    priorities: explicit redis_id -> priority mapping, higher starts first.
+    """
+    ORDERS = (None, 'data_size')
+
+    def __init__(self, redis_service, max_workers: int = 8, order: Optional[str] = None,
+                 priorities: Optional[Dict[str, int]] = None, resource_gate: Optional[ResourceGate] = None):
+        if order not in self.ORDERS:
+            raise ValueError(f"Unknown startup order: {order}")
+        self.redis_service = redis_service
+        self.max_workers = max(1, max_workers)
+        self.order = order
+        self.priorities = priorities or {}
+        self.resource_gate = resource_gate
+
+    def run(self, instances: List[RedisInstance]) -> StartupReport:
+        report = StartupReport()
+        started = time.monotonic()
+        slots = threading.BoundedSemaphore(self.max_workers)
+        serial = False
+        futures = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for instance in self._ordered(instances):
+                # Only launch when a worker is free, so the gate sees current load
+                slots.acquire()
+                if self.resource_gate and not serial:
+                    report.throttled_seconds += self.resource_gate.wait_for_headroom()
+                    if self.resource_gate.exhausted:
+                        # Headroom never came back, keep only one launch in flight from here on
+                        for _ in range(self.max_workers - 1):
+                            slots.acquire()
+                        serial = True
+                future = pool.submit(self.redis_service.start_instance, instance.id)
+                future.add_done_callback(lambda _: slots.release())
+                futures.append((instance.id, future))
+
+        for redis_id, future in futures:
+            try:
+                future.result()
+                report.started.append(redis_id)
+                if redis_id in self.redis_service.startup_times:
+                    report.startup_times[redis_id] = self.redis_service.startup_times[redis_id]
+            except Exception as e:
+                report.failed[redis_id] = str(e)
+
+        report.elapsed = time.monotonic() - started
+        return report
+
+    def _ordered(self, instances: List[RedisInstance]) -> List[RedisInstance]:
+        ordered = list(instances)
+        if self.order == 'data_size':
+            ordered.sort(key=lambda instance: self._data_size(instance.data_dir), reverse=True)
+        if self.priorities:
+            # Stable sort keeps the data size order within the same priority
+            ordered.sort(key=lambda instance: self.priorities.get(instance.id, 0), reverse=True)
+        return ordered
+
+    @staticmethod
+    def _data_size(path: str) -> int:
+        total = 0
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+                    elif entry.is_dir(follow_symlinks=False):
+                        total += StartupEngine._data_size(entry.path)
+        except OSError:
+            pass
+        return total
@@ -0,0 +1,176 @@
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+from domain.redis.domain import RedisInstance, RedisStatus
+
+CONFIG_FILE_NAME = "redis.service.conf"
+
+
+@dataclass
+class ConfigSnapshot:
+    mtime_ns: int
+    size: int
+    ctime: float
+    port: Optional[int]
+    password: Optional[str]
+    unix_socket: Optional[str] = None
+
+
+@dataclass
+class SyncResult:
+    inserted: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    parsed: int = 0
+    skipped: int = 0
+
+
+class FilesystemSync:
+    """
+    Reconciles the instance directories under base_path with the repository.
+    One scandir pass and one bulk read per run, all changes commit in a single transaction.
+    Config files whose mtime and size are unchanged since the last run are not re-read.
+    lock is shared with the service so a create or delete is never seen half done.
+    """
+    def __init__(self, repository, port_allocator, base_path: str, lock: Optional[threading.RLock] = None):
+        self.repository = repository
+        self.port_allocator = port_allocator
+        self.base_path = base_path
+        self._configs: Dict[str, ConfigSnapshot] = {}
+        self._base_mtime_ns: Optional[int] = None
+        self._pending: Set[str] = set()
+        self._lock = lock or threading.RLock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sync(self) -> SyncResult:
+        with self._lock:
+            return self._sync()
+
+    def sync_changed(self) -> Optional[SyncResult]:
+        """
+        Cheap periodic check: when no directory was added or removed, only directories
+        that had no usable config on the last run are looked at again
+        """
+        with self._lock:
+            try:
+                base_mtime_ns = os.stat(self.base_path).st_mtime_ns
+            except OSError:
+                base_mtime_ns = None
+            if self._base_mtime_ns is not None and base_mtime_ns == self._base_mtime_ns:
+                if not self._pending:
+                    return None
+                return self._sync(only=set(self._pending))
+            return self._sync()
+
+    def start(self, interval: float = 30.0):
+        """Reconcile in a background thread every interval seconds"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, interval: float):
+        while not self._stop_event.wait(interval):
+            try:
+                result = self.sync_changed()
+                if result and (result.inserted or result.deleted):
+                    print(f"Filesystem sync: {len(result.inserted)} added, {len(result.deleted)} removed")
+            except Exception as e:
+                print(f"Error syncing with filesystem: {e}")
+
+    def _sync(self, only: Optional[Set[str]] = None) -> SyncResult:
+        result = SyncResult()
+        # Repository first: an instance created after this read is on disk but not in the
+        # snapshot and is merely skipped, the other order would delete its row
+        db_instances = {instance.id: instance for instance in self.repository.find_all()}
+        try:
+            base_mtime_ns = os.stat(self.base_path).st_mtime_ns
+            with os.scandir(self.base_path) as entries:
+                fs_ids = {entry.name for entry in entries
+                          if entry.is_dir() and not entry.name.startswith('.')}
+        except FileNotFoundError:
+            base_mtime_ns = None
+            fs_ids = set()
+
+        deletes = [] if only is not None else [
+            instance for instance in db_instances.values()
+            if instance.id not in fs_ids and not os.path.isdir(os.path.join(self.base_path, instance.id))
+        ]
+        inserts = []
+        pending = set() if only is None else self._pending - only
+        for fs_id in (fs_ids if only is None else only & fs_ids):
+            config_path = os.path.join(self.base_path, fs_id, CONFIG_FILE_NAME)
+            snapshot = self._read_config(fs_id, config_path, result)
+            if snapshot is None or not (snapshot.port or snapshot.unix_socket):
+                pending.add(fs_id)
+                continue
+            if fs_id not in db_instances:
+                inserts.append(RedisInstance(
+                    id=fs_id,
+                    port=snapshot.port or None,
+                    config_path=config_path,
+                    data_dir=os.path.join(self.base_path, fs_id, "data"),
+                    created_at=datetime.fromtimestamp(snapshot.ctime),
+                    status=RedisStatus.STOPPED,
+                    service_status=0,
+                    password=snapshot.password,
+                    unix_socket=snapshot.unix_socket
+                ))
+
+        for stale_id in set(self._configs) - fs_ids:
+            del self._configs[stale_id]
+
+        if inserts or deletes:
+            with self.repository.transaction():
+                self.repository.delete_many([instance.id for instance in deletes])
+                self.repository.save_many(inserts)
+
+        for instance in deletes:
+            self.port_allocator.release(instance.port)
+            result.deleted.append(instance.id)
+        for instance in inserts:
+            self.port_allocator.mark_used(instance.port)
+            result.inserted.append(instance.id)
+
+        self._pending = pending
+        if only is None:
+            self._base_mtime_ns = base_mtime_ns
+        return result
+
+    def _read_config(self, fs_id: str, config_path: str, result: SyncResult) -> Optional[ConfigSnapshot]:
+        try:
+            stat = os.stat(config_path)
+        except FileNotFoundError:
+            self._configs.pop(fs_id, None)
+            return None
+
+        cached = self._configs.get(fs_id)
+        if cached and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+            result.skipped += 1
+            return cached
+
+        port = None
+        password = None
+        unix_socket = None
+        with open(config_path, 'r') as f:
+            for line in f:
+                if line.startswith('port'):
+                    port = int(line.split()[1])
+                elif line.startswith('requirepass'):
+                    password = line.split(None, 1)[1].strip()
+                elif line.startswith('unixsocket '):
+                    unix_socket = line.split(None, 1)[1].strip()
+
+        snapshot = ConfigSnapshot(stat.st_mtime_ns, stat.st_size, stat.st_ctime, port, password, unix_socket)
+        self._configs[fs_id] = snapshot
+        result.parsed += 1
+        return snapshot
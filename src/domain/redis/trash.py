@@ -0,0 +1,192 @@
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Dict, Optional
+from domain.metrics.timing import timed
+from infra.throttle import RateLimiter
+
+
+class TrashReclaimer:
+    """
+    Second phase of instance deletion.
+    Deleted instance directories are renamed into trash_path, which is on the same
+    filesystem and thus atomic, and this reclaimer removes them in the background.
+    Large files are truncated chunk by chunk before they are unlinked so freeing
+    a multi-GB data directory does not saturate the disk. The trash directory itself
+    is the queue, whatever is left there after a restart is picked up again.
+    Pending bytes are counted once on first use and then kept up to date by move()
+    and the reclaimer, so stats() does not walk the trash.
+    """
+    def __init__(self, trash_path: str, rate_limit: float = 64 * 1024 * 1024,
+                 chunk_size: int = 16 * 1024 * 1024, interval: float = 30.0):
+        self.trash_path = trash_path
+        self.rate_limit = rate_limit
+        self.chunk_size = chunk_size
+        self.interval = interval
+        self.limiter = RateLimiter(rate_limit, burst=max(rate_limit, chunk_size))
+        self.reclaimed_bytes = 0
+        self.reclaimed_entries = 0
+        self.last_error: Optional[str] = None
+        self._pending_bytes = 0
+        self._pending_entries = 0
+        self._counted = False
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._count_existing()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def move(self, path: str, name: str) -> Optional[str]:
+        """
+        Rename a directory into the trash and wake the reclaimer,
+        returns the trash path or None when there was nothing to move
+        """
+        if not os.path.exists(path):
+            return None
+        self._count_existing()
+        size = self._size(path)
+        os.makedirs(self.trash_path, exist_ok=True)
+        # Unique per deletion, the same id can be deleted again before the old one is reclaimed
+        target = os.path.join(self.trash_path, f"{name}-{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}")
+        os.rename(path, target)
+        with self._lock:
+            self._pending_bytes += size
+            self._pending_entries += 1
+        self._wakeup.set()
+        return target
+
+    def stats(self) -> Dict:
+        self._count_existing()
+        with self._lock:
+            entries = self._pending_entries
+            pending = self._pending_bytes
+        return {
+            'pending_entries': entries,
+            'pending_bytes': pending,
+            'reclaimed_entries': self.reclaimed_entries,
+            'reclaimed_bytes': self.reclaimed_bytes,
+            'rate_limit_bytes': self.rate_limit,
+            'last_error': self.last_error
+        }
+
+    @timed('trash.reclaim')
+    def reclaim(self) -> int:
+        """Remove everything currently in the trash, returns the number of entries removed"""
+        try:
+            with os.scandir(self.trash_path) as scan:
+                entries = sorted(entry.path for entry in scan)
+        except FileNotFoundError:
+            return 0
+        removed = 0
+        for path in entries:
+            if self._stop_event.is_set():
+                break
+            try:
+                if not self._remove_tree(path):
+                    break
+                removed += 1
+                self.reclaimed_entries += 1
+                with self._lock:
+                    self._pending_entries = max(0, self._pending_entries - 1)
+                self.last_error = None
+            except OSError as e:
+                # Left in place and retried on the next pass
+                self.last_error = f"{path}: {e}"
+                print(f"Failed to reclaim {path}: {e}")
+        return removed
+
+    def _remove_tree(self, path: str) -> bool:
+        """False when interrupted by stop(), the rest is removed after the next start"""
+        if os.path.isdir(path) and not os.path.islink(path):
+            for root, dirs, files in os.walk(path, topdown=False):
+                for name in files:
+                    if not self._remove_file(os.path.join(root, name)):
+                        return False
+                for name in dirs:
+                    child = os.path.join(root, name)
+                    if os.path.islink(child):
+                        os.unlink(child)
+                    else:
+                        os.rmdir(child)
+            os.rmdir(path)
+            return True
+        return self._remove_file(path)
+
+    def _remove_file(self, path: str) -> bool:
+        if os.path.islink(path):
+            size = os.lstat(path).st_size
+            os.unlink(path)
+            self._freed(size)
+            return True
+        size = os.path.getsize(path)
+        # Shrink big files a chunk at a time, each step frees a bounded amount of blocks
+        while size > self.chunk_size and not self._stop_event.is_set():
+            self.limiter.consume(self.chunk_size)
+            size -= self.chunk_size
+            os.truncate(path, size)
+            self._freed(self.chunk_size)
+        if self._stop_event.is_set():
+            return False
+        self.limiter.consume(size)
+        os.unlink(path)
+        self._freed(size)
+        return True
+
+    def _freed(self, size: int):
+        with self._lock:
+            self.reclaimed_bytes += size
+            self._pending_bytes = max(0, self._pending_bytes - size)
+
+    def _count_existing(self):
+        """One walk of the trash for what an earlier run left behind"""
+        with self._lock:
+            if self._counted:
+                return
+            self._counted = True
+            try:
+                with os.scandir(self.trash_path) as scan:
+                    for entry in scan:
+                        self._pending_entries += 1
+                        self._pending_bytes += self._size(entry.path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _size(path: str) -> int:
+        if not os.path.isdir(path) or os.path.islink(path):
+            try:
+                return os.lstat(path).st_size
+            except OSError:
+                return 0
+        total = 0
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    total += os.lstat(os.path.join(root, name)).st_size
+                except OSError:
+                    pass
+        return total
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._wakeup.clear()
+            try:
+                self.reclaim()
+            except Exception as e:
+                print(f"Error reclaiming trash: {e}")
+            self._wakeup.wait(self.interval)
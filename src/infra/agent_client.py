@@ -0,0 +1,36 @@
+import json
+import urllib.error
+import urllib.request
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+class AgentClient:
+    """
+    JSON over HTTP client for the REST API of one agent.
+    HTTP error statuses are returned to the caller, only an unreachable agent raises.
+    """
+    def __init__(self, base_url: str, timeout: float = 5.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, method: str, path: str, payload: Optional[Dict] = None,
+                query: Optional[Dict] = None, timeout: Optional[float] = None) -> Tuple[int, bytes, str]:
+        url = self.base_url + path
+        if query:
+            url += '?' + urlencode(query)
+        data = json.dumps(payload).encode() if payload is not None else None
+        headers = {'Content-Type': 'application/json'} if data is not None else {}
+        req = urllib.request.Request(url, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=timeout or self.timeout) as response:
+                return response.status, response.read(), response.headers.get('Content-Type', 'application/json')
+        except urllib.error.HTTPError as e:
+            return e.code, e.read(), e.headers.get('Content-Type', 'application/json')
+        except OSError as e:
+            raise RuntimeError(f"Agent {self.base_url} is unreachable: {e}")
+
+    def get_json(self, path: str, query: Optional[Dict] = None):
+        status, body, _ = self.request('GET', path, query=query)
+        if status >= 400:
+            raise RuntimeError(f"Agent {self.base_url} returned {status} for {path}")
+        return json.loads(body)
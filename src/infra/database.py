@@ -1,22 +1,105 @@
 import sqlite3
+import threading
+import weakref
 from datetime import datetime
 from contextlib import contextmanager
 
+class _ThreadConnection:
+    """
+    Connection of one thread. It is closed by release() or, at the latest,
+    when the thread ends and its thread-local state is dropped.
+    """
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.depth = 0
+        self._finalizer = weakref.finalize(self, conn.close)
+
+    def close(self):
+        self._finalizer()
+
 class Database:
-    def __init__(self, db_path: str = 'redis_manager.db'):
+    """
+    SQLite access with one reusable WAL-mode connection per thread.
+    Connections run in autocommit mode, multi-statement work goes through transaction().
+    A thread's connection is closed when the thread ends, release() closes it earlier.
+    """
+    def __init__(self, db_path: str = 'redis_manager.db', synchronous: str = 'NORMAL',
+                 busy_timeout_ms: int = 5000, cached_statements: int = 256):
         self.db_path = db_path
+        self.synchronous = synchronous
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        # Weak, so connections of finished threads are not kept alive
+        self._connections = weakref.WeakSet()
+        self._lock = threading.Lock()
         self.init_db()
     
     @contextmanager
     def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
-        try:
-            yield conn
-        finally:
-            conn.close()
+        holder = getattr(self._local, 'holder', None)
+        if holder is None:
+            holder = _ThreadConnection(self._connect())
+            self._local.holder = holder
+            with self._lock:
+                self._connections.add(holder)
+        yield holder.conn
+
+    @contextmanager
+    def transaction(self):
+        """
+        Unit of work: everything inside commits once at the outermost block.
+        Nested blocks join the enclosing transaction.
+        """
+        with self.get_connection() as conn:
+            holder = self._local.holder
+            depth = holder.depth
+            if depth == 0:
+                conn.execute('BEGIN IMMEDIATE')
+            holder.depth = depth + 1
+            try:
+                yield conn
+            except BaseException:
+                holder.depth = depth
+                if depth == 0:
+                    conn.execute('ROLLBACK')
+                raise
+            holder.depth = depth
+            if depth == 0:
+                conn.execute('COMMIT')
+
+    def release(self):
+        """Close the calling thread's connection, a later call opens a new one"""
+        holder = getattr(self._local, 'holder', None)
+        if holder is None or holder.depth > 0:
+            return
+        del self._local.holder
+        with self._lock:
+            self._connections.discard(holder)
+        holder.close()
+
+    def close(self):
+        with self._lock:
+            holders = list(self._connections)
+            self._connections = weakref.WeakSet()
+        for holder in holders:
+            holder.close()
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={self.synchronous}')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        return conn
     
     def init_db(self):
-        with self.get_connection() as conn:
+        with self.transaction() as conn:
             c = conn.cursor()
             c.execute('''
                 CREATE TABLE IF NOT EXISTS redis_instances (
@@ -30,4 +113,55 @@ class Database:
                     password TEXT
                 )
             ''')
-            conn.commit()
\ No newline at end of file
+            self._add_column(c, 'redis_instances', 'profile', "TEXT DEFAULT 'default'")
+            self._add_column(c, 'redis_instances', 'unix_socket', 'TEXT')
+            self._add_column(c, 'redis_instances', 'tier', "TEXT DEFAULT 'standard'")
+            c.execute('CREATE INDEX IF NOT EXISTS idx_redis_instances_status ON redis_instances (status, id)')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_redis_instances_service_status ON redis_instances (service_status, id)')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_redis_instances_created_at ON redis_instances (created_at, id)')
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS redis_processes (
+                    redis_id TEXT PRIMARY KEY,
+                    pid INTEGER,
+                    create_time REAL
+                )
+            ''')
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS cluster_agents (
+                    id TEXT PRIMARY KEY,
+                    url TEXT,
+                    registered_at TIMESTAMP
+                )
+            ''')
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS cluster_placements (
+                    redis_id TEXT PRIMARY KEY,
+                    agent_id TEXT,
+                    created_at TIMESTAMP
+                )
+            ''')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_cluster_placements_agent ON cluster_placements (agent_id)')
+            c.execute('''
+                CREATE TABLE IF NOT EXISTS backups (
+                    id TEXT PRIMARY KEY,
+                    redis_id TEXT,
+                    path TEXT,
+                    created_at TIMESTAMP,
+                    status TEXT,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP,
+                    source_bytes INTEGER DEFAULT 0,
+                    size_bytes INTEGER DEFAULT 0,
+                    files TEXT,
+                    lastsave INTEGER,
+                    error TEXT
+                )
+            ''')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_backups_redis_id ON backups (redis_id, created_at)')
+
+    @staticmethod
+    def _add_column(cursor, table: str, column: str, definition: str):
+        """Add a column to an existing table created by an older version"""
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
@@ -1,20 +1,47 @@
 # infra/repository.py
-from typing import List, Optional
+import json
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import replace
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
-from domain.redis.domain import RedisInstance, RedisStatus
+from domain.redis.domain import InstanceFilter, RedisInstance, RedisStatus
+from domain.process.domain import ProcessEntry
+from domain.cluster.domain import AgentNode, Placement
+from domain.backup.domain import Backup, BackupStatus
+from domain.metrics.timing import timed
 from infra.database import Database
 
+# Columns that can be projected by listings, the password is never listed
+LISTABLE_COLUMNS = ('id', 'port', 'status', 'service_status', 'config_path', 'data_dir', 'created_at', 'profile',
+                    'unix_socket', 'tier')
+
 class RedisRepository:
-    def __init__(self, database: Database):
+    """
+    Repository for Redis instances with a read-through cache indexed by id and port.
+    The cache is filled lazily and kept coherent by every write going through this class.
+    cache_ttl bounds staleness when other processes write to the same database.
+    """
+    def __init__(self, database: Database, cache_ttl: Optional[float] = None):
         self.database = database
+        self.cache_ttl = cache_ttl
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache_lock = threading.RLock()
+        self._by_id: Dict[str, Tuple[RedisInstance, float]] = {}
+        self._id_by_port: Dict[int, str] = {}
+        self._all_loaded_at: Optional[float] = None
+        self._generation = 0
     
+    @timed('repository.save')
     def save(self, instance: RedisInstance):
-        with self.database.get_connection() as conn:
+        with self.database.transaction() as conn:
             c = conn.cursor()
             c.execute('''
                 INSERT OR REPLACE INTO redis_instances 
-                (id, port, config_path, data_dir, created_at, status, service_status, password)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                (id, port, config_path, data_dir, created_at, status, service_status, password, profile, unix_socket, tier)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 instance.id,
                 instance.port,
@@ -23,106 +50,256 @@ class RedisRepository:
                 instance.created_at.isoformat(),
                 instance.status.value,
                 instance.service_status,
-                instance.password
+                instance.password,
+                instance.profile,
+                instance.unix_socket,
+                instance.tier
             ))
-            conn.commit()
+        with self._cache_lock:
+            self._generation += 1
+            self._cache_put(replace(instance))
     
+    @timed('repository.save_many')
+    def save_many(self, instances: List[RedisInstance]):
+        """
+        Insert or replace several Redis instances in one statement batch
+        """
+        if not instances:
+            return
+        with self.database.transaction() as conn:
+            c = conn.cursor()
+            c.executemany('''
+                INSERT OR REPLACE INTO redis_instances 
+                (id, port, config_path, data_dir, created_at, status, service_status, password, profile, unix_socket, tier)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [(
+                instance.id,
+                instance.port,
+                instance.config_path,
+                instance.data_dir,
+                instance.created_at.isoformat(),
+                instance.status.value,
+                instance.service_status,
+                instance.password,
+                instance.profile,
+                instance.unix_socket,
+                instance.tier
+            ) for instance in instances])
+        with self._cache_lock:
+            self._generation += 1
+            for instance in instances:
+                self._cache_put(replace(instance))
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group several repository writes into a single commit
+        """
+        try:
+            with self.database.transaction() as conn:
+                yield conn
+        except BaseException:
+            # Cached writes of a rolled back transaction are not trustworthy
+            self.invalidate_cache()
+            raise
+
+    @timed('repository.find_by_id')
     def find_by_id(self, redis_id: str) -> Optional[RedisInstance]:
+        with self._cache_lock:
+            cached = self._cache_get(redis_id)
+            if cached:
+                self.cache_hits += 1
+                return replace(cached)
+            self.cache_misses += 1
+            generation = self._generation
+
         with self.database.get_connection() as conn:
             c = conn.cursor()
             c.execute('SELECT * FROM redis_instances WHERE id = ?', (redis_id,))
             row = c.fetchone()
             
             if row:
-                return RedisInstance(
-                    id=row[0],
-                    port=row[1],
-                    config_path=row[2],
-                    data_dir=row[3],
-                    created_at=datetime.fromisoformat(row[4]),
-                    status=RedisStatus(row[5]),
-                    service_status=int(row[6]),
-                    password=row[7]
-                )
+                instance = self._row_to_instance(row)
+                self._cache_fill([instance], generation)
+                return instance
             return None
 
+    @timed('repository.find_all')
     def find_all(self) -> List[RedisInstance]:
         """
         Retrieve all Redis instances from the database
         """
+        with self._cache_lock:
+            if self._all_loaded_at is not None and self._is_fresh(self._all_loaded_at):
+                self.cache_hits += 1
+                return [replace(instance) for instance, _ in self._by_id.values()]
+            self.cache_misses += 1
+            generation = self._generation
+
         with self.database.get_connection() as conn:
             c = conn.cursor()
             c.execute('SELECT * FROM redis_instances')
             rows = c.fetchall()
             
-            return [
-                RedisInstance(
-                    id=row[0],
-                    port=row[1],
-                    config_path=row[2],
-                    data_dir=row[3],
-                    created_at=datetime.fromisoformat(row[4]),
-                    status=RedisStatus(row[5]),
-                    service_status=int(row[6])
-                )
-                for row in rows
-            ]
+            instances = [self._row_to_instance(row) for row in rows]
+
+        with self._cache_lock:
+            if generation == self._generation:
+                self._by_id = {}
+                self._id_by_port = {}
+                for instance in instances:
+                    self._cache_put(replace(instance))
+                self._all_loaded_at = time.monotonic()
+        return instances
+
+    def iter_rows(self, filters: InstanceFilter, columns: List[str], after_id: Optional[str] = None,
+                  limit: Optional[int] = None, batch_size: int = 500) -> Iterator[Tuple]:
+        """
+        Stream projected rows ordered by id without hydrating instances.
+        Keyset pagination on id keeps every page an index range scan.
+        """
+        unknown = [column for column in columns if column not in LISTABLE_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        conditions = []
+        params = []
+        if filters.status is not None:
+            conditions.append('status = ?')
+            params.append(filters.status.value)
+        if filters.service_status is not None:
+            conditions.append('service_status = ?')
+            params.append(filters.service_status)
+        if filters.port_min is not None:
+            conditions.append('port >= ?')
+            params.append(filters.port_min)
+        if filters.port_max is not None:
+            conditions.append('port <= ?')
+            params.append(filters.port_max)
+        if filters.created_after is not None:
+            conditions.append('created_at >= ?')
+            params.append(filters.created_after.isoformat())
+        if filters.created_before is not None:
+            conditions.append('created_at < ?')
+            params.append(filters.created_before.isoformat())
+        if after_id is not None:
+            conditions.append('id > ?')
+            params.append(after_id)
+
+        query = f"SELECT {', '.join(columns)} FROM redis_instances"
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        query += ' ORDER BY id'
+        if limit is not None:
+            query += ' LIMIT ?'
+            params.append(limit)
+
+        with self.database.get_connection() as conn:
+            c = conn.cursor()
+            c.execute(query, params)
+            while True:
+                rows = c.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+
+    @timed('repository.find_all_ports')
+    def find_all_ports(self) -> List[int]:
+        """
+        Retrieve the ports of all Redis instances without hydrating rows
+        """
+        with self.database.get_connection() as conn:
+            c = conn.cursor()
+            c.execute('SELECT port FROM redis_instances WHERE port IS NOT NULL')
+            return [row[0] for row in c.fetchall()]
 
+    @timed('repository.delete')
     def delete(self, redis_id: str):
         """
         Delete a Redis instance from the database
         """
-        with self.database.get_connection() as conn:
+        with self.database.transaction() as conn:
             c = conn.cursor()
             c.execute('DELETE FROM redis_instances WHERE id = ?', (redis_id,))
-            conn.commit()
+        with self._cache_lock:
+            self._generation += 1
+            self._cache_remove(redis_id)
 
+    @timed('repository.delete_many')
+    def delete_many(self, redis_ids: List[str]):
+        """
+        Delete several Redis instances from the database
+        """
+        if not redis_ids:
+            return
+        with self.database.transaction() as conn:
+            c = conn.cursor()
+            c.executemany('DELETE FROM redis_instances WHERE id = ?', [(redis_id,) for redis_id in redis_ids])
+        with self._cache_lock:
+            self._generation += 1
+            for redis_id in redis_ids:
+                self._cache_remove(redis_id)
+
+    @timed('repository.update_status')
     def update_status(self, redis_id: str, status: RedisStatus):
         """
         Update the status of a Redis instance
         """
-        with self.database.get_connection() as conn:
+        with self.database.transaction() as conn:
             c = conn.cursor()
             c.execute('''
                 UPDATE redis_instances 
                 SET status = ?
                 WHERE id = ?
             ''', (status.value, redis_id))
-            conn.commit()
+        with self._cache_lock:
+            self._generation += 1
+            cached = self._by_id.get(redis_id)
+            if cached:
+                self._cache_put(replace(cached[0], status=status))
 
+    @timed('repository.update_service_status')
     def update_service_status(self, redis_id: str, service_status: int):
         """
         Update the service_status of a Redis instance
         """
-        with self.database.get_connection() as conn:
+        with self.database.transaction() as conn:
             c = conn.cursor()
             c.execute('''
                 UPDATE redis_instances 
                 SET service_status = ?
                 WHERE id = ?
             ''', (service_status, redis_id))
-            conn.commit()
+        with self._cache_lock:
+            self._generation += 1
+            cached = self._by_id.get(redis_id)
+            if cached:
+                self._cache_put(replace(cached[0], service_status=service_status))
 
+    @timed('repository.find_by_port')
     def find_by_port(self, port: int) -> Optional[RedisInstance]:
         """
         Find a Redis instance by its port
         Returns None if not found
         """
+        with self._cache_lock:
+            redis_id = self._id_by_port.get(port)
+            cached = self._cache_get(redis_id) if redis_id else None
+            if cached:
+                self.cache_hits += 1
+                return replace(cached)
+            self.cache_misses += 1
+            generation = self._generation
+
         with self.database.get_connection() as conn:
             c = conn.cursor()
             c.execute('SELECT * FROM redis_instances WHERE port = ?', (port,))
             row = c.fetchone()
             
             if row:
-                return RedisInstance(
-                    id=row[0],
-                    port=row[1],
-                    config_path=row[2],
-                    data_dir=row[3],
-                    created_at=datetime.fromisoformat(row[4]),
-                    status=RedisStatus(row[5]),
-                    service_status=int(row[6])
-                )
+                instance = self._row_to_instance(row)
+                self._cache_fill([instance], generation)
+                return instance
             return None
 
     def exists(self, redis_id: str) -> bool:
@@ -134,6 +311,16 @@ class RedisRepository:
             c.execute('SELECT 1 FROM redis_instances WHERE id = ?', (redis_id,))
             return c.fetchone() is not None
 
+    def count_instances(self) -> Dict[str, int]:
+        """
+        Number of instances and of instances meant to be running
+        """
+        with self.database.get_connection() as conn:
+            c = conn.cursor()
+            c.execute('SELECT COUNT(*), COALESCE(SUM(service_status = 1), 0) FROM redis_instances')
+            total, enabled = c.fetchone()
+            return {'total': total, 'enabled': enabled}
+
     def port_exists(self, port: int) -> bool:
         """
         Check if a port is already in use by any Redis instance
@@ -141,4 +328,271 @@ class RedisRepository:
         with self.database.get_connection() as conn:
             c = conn.cursor()
             c.execute('SELECT 1 FROM redis_instances WHERE port = ?', (port,))
-            return c.fetchone() is not None
\ No newline at end of file
+            return c.fetchone() is not None
+
+    def cache_stats(self) -> Dict:
+        with self._cache_lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                'hits': self.cache_hits,
+                'misses': self.cache_misses,
+                'hit_ratio': self.cache_hits / lookups if lookups else None,
+                'size': len(self._by_id),
+                'fully_loaded': self._all_loaded_at is not None,
+                'ttl': self.cache_ttl
+            }
+
+    def invalidate_cache(self):
+        with self._cache_lock:
+            self._generation += 1
+            self._by_id = {}
+            self._id_by_port = {}
+            self._all_loaded_at = None
+
+    @staticmethod
+    def _row_to_instance(row) -> RedisInstance:
+        return RedisInstance(
+            id=row[0],
+            port=row[1],
+            config_path=row[2],
+            data_dir=row[3],
+            created_at=datetime.fromisoformat(row[4]),
+            status=RedisStatus(row[5]),
+            service_status=int(row[6]),
+            password=row[7],
+            profile=row[8] or 'default',
+            unix_socket=row[9],
+            tier=row[10] or 'standard'
+        )
+
+    def _is_fresh(self, loaded_at: float) -> bool:
+        return self.cache_ttl is None or time.monotonic() - loaded_at < self.cache_ttl
+
+    def _cache_get(self, redis_id: str) -> Optional[RedisInstance]:
+        cached = self._by_id.get(redis_id)
+        if cached is None:
+            return None
+        instance, loaded_at = cached
+        if not self._is_fresh(loaded_at):
+            self._cache_remove(redis_id)
+            return None
+        return instance
+
+    def _cache_fill(self, instances: List[RedisInstance], generation: int):
+        # Skip rows read before a concurrent write, they may already be stale
+        with self._cache_lock:
+            if generation == self._generation:
+                for instance in instances:
+                    self._cache_put(replace(instance))
+
+    def _cache_put(self, instance: RedisInstance):
+        previous = self._by_id.get(instance.id)
+        if previous and previous[0].port != instance.port:
+            self._id_by_port.pop(previous[0].port, None)
+        self._by_id[instance.id] = (instance, time.monotonic())
+        if instance.port is not None:
+            self._id_by_port[instance.port] = instance.id
+
+    def _cache_remove(self, redis_id: str):
+        previous = self._by_id.pop(redis_id, None)
+        if previous:
+            self._id_by_port.pop(previous[0].port, None)
+        # An expired entry means the full listing is no longer complete
+        if self.cache_ttl is not None:
+            self._all_loaded_at = None
+
+class ProcessRepository:
+    """
+    Persistent registry of the redis-server processes spawned by the manager
+    """
+    def __init__(self, database: Database):
+        self.database = database
+
+    def save(self, entry: ProcessEntry):
+        with self.database.transaction() as conn:
+            c = conn.cursor()
+            c.execute('''
+                INSERT OR REPLACE INTO redis_processes
+                (redis_id, pid, create_time)
+                VALUES (?, ?, ?)
+            ''', (entry.redis_id, entry.pid, entry.create_time))
+
+    def find(self, redis_id: str) -> Optional[ProcessEntry]:
+        with self.database.get_connection() as conn:
+            c = conn.cursor()
+            c.execute('SELECT redis_id, pid, create_time FROM redis_processes WHERE redis_id = ?', (redis_id,))
+            row = c.fetchone()
+
+            if row:
+                return ProcessEntry(redis_id=row[0], pid=int(row[1]), create_time=float(row[2]))
+            return None
+
+    def delete(self, redis_id: str):
+        with self.database.transaction() as conn:
+            c = conn.cursor()
+            c.execute('DELETE FROM redis_processes WHERE redis_id = ?', (redis_id,))
+
+class ClusterRepository:
+    """
+    Agents known to the controller and the agent hosting each instance
+    """
+    def __init__(self, database: Database):
+        self.database = database
+
+    def save_agent(self, agent: AgentNode):
+        with self.database.transaction() as conn:
+            c = conn.cursor()
+            c.execute('''
+                INSERT OR REPLACE INTO cluster_agents
+                (id, url, registered_at)
+                VALUES (?, ?, ?)
+            ''', (agent.id, agent.url, agent.registered_at.isoformat()))
+
+    def find_agents(self) -> List[AgentNode]:
+        with self.database.get_connection() as conn:
+            c = conn.cursor()
+            c.execute('SELECT id, url, registered_at FROM cluster_agents ORDER BY id')
+            return [AgentNode(id=row[0], url=row[1], registered_at=datetime.fromisoformat(row[2]))
+                    for row in c.fetchall()]
+
+    def delete_agent(self, agent_id: str):
+        with self.database.transaction() as conn:
+            c = conn.cursor()
+            c.execute('DELETE FROM cluster_agents WHERE id = ?', (agent_id,))
+
+    def reserve_placement(self, placement: Placement) -> bool:
+        """
+        Claim a redis_id for an agent, False when the id is already placed
+        """
+        with self.database.transaction() as conn:
+            c = conn.cursor()
+            c.execute('''
+                INSERT OR IGNORE INTO cluster_placements
+                (redis_id, agent_id, created_at)
+                VALUES (?, ?, ?)
+            ''', (placement.redis_id, placement.agent_id, placement.created_at.isoformat()))
+            return c.rowcount == 1
+
+    def find_placement(self, redis_id: str) -> Optional[Placement]:
+        with self.database.get_connection() as conn:
+            c = conn.cursor()
+            c.execute('SELECT redis_id, agent_id, created_at FROM cluster_placements WHERE redis_id = ?', (redis_id,))
+            row = c.fetchone()
+
+            if row:
+                return Placement(redis_id=row[0], agent_id=row[1], created_at=datetime.fromisoformat(row[2]))
+            return None
+
+    def find_placement_ids(self, agent_id: str) -> List[str]:
+        with self.database.get_connection() as conn:
+            c = conn.cursor()
+            c.execute('SELECT redis_id FROM cluster_placements WHERE agent_id = ?', (agent_id,))
+            return [row[0] for row in c.fetchall()]
+
+    def count_placements(self) -> Dict[str, int]:
+        with self.database.get_connection() as conn:
+            c = conn.cursor()
+            c.execute('SELECT agent_id, COUNT(*) FROM cluster_placements GROUP BY agent_id')
+            return {row[0]: row[1] for row in c.fetchall()}
+
+    def delete_placement(self, redis_id: str):
+        with self.database.transaction() as conn:
+            c = conn.cursor()
+            c.execute('DELETE FROM cluster_placements WHERE redis_id = ?', (redis_id,))
+
+    def replace_agent_placements(self, agent_id: str, redis_ids: List[str]):
+        """
+        Make the placements of one agent match the instances it reports.
+        Ids already placed on another agent are left alone.
+        """
+        now = datetime.now().isoformat()
+        with self.database.transaction() as conn:
+            c = conn.cursor()
+            c.execute('SELECT redis_id FROM cluster_placements WHERE agent_id = ?', (agent_id,))
+            stale = {row[0] for row in c.fetchall()} - set(redis_ids)
+            c.executemany('DELETE FROM cluster_placements WHERE redis_id = ?', [(redis_id,) for redis_id in stale])
+            c.executemany('''
+                INSERT OR IGNORE INTO cluster_placements
+                (redis_id, agent_id, created_at)
+                VALUES (?, ?, ?)
+            ''', [(redis_id, agent_id, now) for redis_id in redis_ids])
+
+
+class BackupRepository:
+    """
+    Catalog of instance backups, the archives themselves live on disk
+    """
+    COLUMNS = ('id, redis_id, path, created_at, status, started_at, finished_at, '
+               'source_bytes, size_bytes, files, lastsave, error')
+
+    def __init__(self, database: Database):
+        self.database = database
+
+    def save(self, backup: Backup):
+        with self.database.transaction() as conn:
+            c = conn.cursor()
+            c.execute(f'''
+                INSERT OR REPLACE INTO backups
+                ({self.COLUMNS})
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                backup.id,
+                backup.redis_id,
+                backup.path,
+                backup.created_at.isoformat(),
+                backup.status.value,
+                backup.started_at.isoformat() if backup.started_at else None,
+                backup.finished_at.isoformat() if backup.finished_at else None,
+                backup.source_bytes,
+                backup.size_bytes,
+                json.dumps(backup.files),
+                backup.lastsave,
+                backup.error
+            ))
+
+    def find_by_id(self, backup_id: str) -> Optional[Backup]:
+        with self.database.get_connection() as conn:
+            c = conn.cursor()
+            c.execute(f'SELECT {self.COLUMNS} FROM backups WHERE id = ?', (backup_id,))
+            row = c.fetchone()
+            return self._row_to_backup(row) if row else None
+
+    def find_all(self, redis_id: Optional[str] = None) -> List[Backup]:
+        """Newest first, optionally only the backups of one instance"""
+        with self.database.get_connection() as conn:
+            c = conn.cursor()
+            if redis_id is None:
+                c.execute(f'SELECT {self.COLUMNS} FROM backups ORDER BY created_at DESC')
+            else:
+                c.execute(f'SELECT {self.COLUMNS} FROM backups WHERE redis_id = ? ORDER BY created_at DESC',
+                          (redis_id,))
+            return [self._row_to_backup(row) for row in c.fetchall()]
+
+    def find_unfinished(self) -> List[Backup]:
+        with self.database.get_connection() as conn:
+            c = conn.cursor()
+            c.execute(f'SELECT {self.COLUMNS} FROM backups WHERE status IN (?, ?)',
+                      (BackupStatus.PENDING.value, BackupStatus.RUNNING.value))
+            return [self._row_to_backup(row) for row in c.fetchall()]
+
+    def delete(self, backup_id: str):
+        with self.database.transaction() as conn:
+            c = conn.cursor()
+            c.execute('DELETE FROM backups WHERE id = ?', (backup_id,))
+
+    @staticmethod
+    def _row_to_backup(row) -> Backup:
+        return Backup(
+            id=row[0],
+            redis_id=row[1],
+            path=row[2],
+            created_at=datetime.fromisoformat(row[3]),
+            status=BackupStatus(row[4]),
+            started_at=datetime.fromisoformat(row[5]) if row[5] else None,
+            finished_at=datetime.fromisoformat(row[6]) if row[6] else None,
+            source_bytes=row[7] or 0,
+            size_bytes=row[8] or 0,
+            files=json.loads(row[9]) if row[9] else [],
+            lastsave=row[10],
+            error=row[11]
+        )
@@ -0,0 +1,29 @@
+import threading
+import time
+from typing import Optional
+
+class RateLimiter:
+    """
+    Token bucket shared by every caller, rate is in units (bytes) per second.
+    Callers take what they need and sleep off the debt, so concurrent users
+    together stay at the rate. A rate of 0 disables limiting.
+    """
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        # One second worth of tokens unless told otherwise
+        self.burst = burst if burst is not None else rate
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: float):
+        if self.rate <= 0 or amount <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
@@ -0,0 +1,36 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+
+from infra.database import Database
+from infra.repository import RedisRepository, ProcessRepository
+from domain.redis.domain import RedisInstance, RedisStatus
+
+
+@pytest.fixture
+def database(tmp_path):
+    db = Database(str(tmp_path / 'redis_manager.db'))
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def repository(database):
+    return RedisRepository(database)
+
+
+@pytest.fixture
+def process_repository(database):
+    return ProcessRepository(database)
+
+
+def make_instance(redis_id: str, port=None, status=RedisStatus.STOPPED, service_status=0) -> RedisInstance:
+    return RedisInstance(id=redis_id, port=port, config_path=f'/data/{redis_id}/redis.service.conf',
+                         data_dir=f'/data/{redis_id}/data', created_at=datetime.now(), status=status,
+                         service_status=service_status, password='secret')
@@ -0,0 +1,87 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from domain.job.domain import JobStatus
+from domain.job.service import JobManager
+
+
+def test_jobs_of_one_instance_run_in_order():
+    manager = JobManager(max_workers=4)
+    order = []
+    lock = threading.Lock()
+
+    def step(index):
+        def run(job):
+            time.sleep(0.01)
+            with lock:
+                order.append(index)
+        return run
+
+    jobs = [manager.submit('start', 'a', step(index)) for index in range(5)]
+    for job in jobs:
+        assert job.wait(5)
+    manager.shutdown()
+
+    assert order == list(range(5))
+
+
+def test_instances_run_in_parallel():
+    manager = JobManager(max_workers=2)
+    barrier = threading.Barrier(2, timeout=5)
+
+    jobs = [manager.submit('start', redis_id, lambda job: barrier.wait()) for redis_id in ('a', 'b')]
+    for job in jobs:
+        assert job.wait(5)
+    manager.shutdown()
+
+    assert [job.status for job in jobs] == [JobStatus.SUCCEEDED, JobStatus.SUCCEEDED]
+
+
+def test_result_and_failure_are_recorded():
+    manager = JobManager()
+
+    def fail(job):
+        raise ValueError('Redis instance b not found')
+
+    ok = manager.submit('start', 'a', lambda job: {'id': 'a'})
+    failed = manager.submit('start', 'b', fail)
+    ok.wait(5)
+    failed.wait(5)
+    manager.shutdown()
+
+    assert ok.status == JobStatus.SUCCEEDED and ok.result == {'id': 'a'}
+    assert failed.status == JobStatus.FAILED and isinstance(failed.exception, ValueError)
+    assert failed.error == 'Redis instance b not found'
+
+
+def test_finished_job_always_has_finished_at():
+    manager = JobManager()
+    seen = []
+
+    def watch(job):
+        # Spins on the same fields _prune reads, a terminal status must come with finished_at
+        deadline = time.monotonic() + 5
+        while not job.finished and time.monotonic() < deadline:
+            pass
+        seen.append(job.finished_at)
+
+    job = manager.submit('stop', 'a', lambda job: time.sleep(0.01))
+    watcher = threading.Thread(target=watch, args=(job,))
+    watcher.start()
+    watcher.join()
+    manager.shutdown()
+
+    assert seen == [job.finished_at] and job.finished_at is not None
+
+
+def test_expired_jobs_are_pruned():
+    manager = JobManager(retention_seconds=60)
+    old = manager.submit('start', 'a', lambda job: None)
+    old.wait(5)
+    old.finished_at = datetime.now() - timedelta(seconds=120)
+
+    manager.submit('start', 'b', lambda job: None).wait(5)
+    manager.shutdown()
+
+    assert manager.get(old.id) is None
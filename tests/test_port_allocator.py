@@ -0,0 +1,61 @@
+import pytest
+
+from domain.process.service import ProcessManager
+from domain.redis.port import PortAllocator
+from conftest import make_instance
+
+
+@pytest.fixture
+def foreign_ports(monkeypatch):
+    """Ports held by processes outside the manager, the bind test reports them in use"""
+    ports = set()
+    monkeypatch.setattr(ProcessManager, 'is_port_in_use', staticmethod(lambda port: port in ports))
+    return ports
+
+
+def test_hands_out_lowest_free_port(repository, foreign_ports):
+    repository.save(make_instance('a', 5000))
+    allocator = PortAllocator(repository, 5000, 5009)
+
+    assert [allocator.reserve() for _ in range(3)] == [5001, 5002, 5003]
+    assert allocator.available() == 6
+
+
+def test_released_port_is_reused(repository, foreign_ports):
+    allocator = PortAllocator(repository, 5000, 5009)
+    first = allocator.reserve()
+    allocator.reserve()
+    allocator.release(first)
+
+    assert allocator.reserve() == first
+
+
+def test_skips_and_retries_ports_held_by_foreign_listeners(repository, foreign_ports):
+    foreign_ports.update({5000, 5001})
+    allocator = PortAllocator(repository, 5000, 5002)
+
+    assert allocator.reserve() == 5002
+    with pytest.raises(RuntimeError):
+        allocator.reserve()
+    foreign_ports.discard(5001)
+    assert allocator.reserve() == 5001
+
+
+def test_available_excludes_blocked_ports(repository, foreign_ports):
+    foreign_ports.update({5000, 5002})
+    allocator = PortAllocator(repository, 5000, 5009)
+    allocator.reserve()
+    allocator.reserve()
+
+    assert allocator.available() == 6
+    allocator.mark_used(5000)
+    assert allocator.available() == 6
+
+
+def test_reserve_many_is_all_or_nothing(repository, foreign_ports):
+    allocator = PortAllocator(repository, 5000, 5002)
+
+    with pytest.raises(RuntimeError):
+        allocator.reserve_many(4)
+    assert allocator.available() == 3
+    assert allocator.reserve_many(3) == [5000, 5001, 5002]
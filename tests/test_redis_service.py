@@ -0,0 +1,61 @@
+import subprocess
+import sys
+
+import pytest
+
+import run
+from infra.database import Database
+from infra.repository import RedisRepository, ProcessRepository
+from domain.redis.port import PortAllocator
+from domain.redis.service import RedisService
+
+
+@pytest.fixture
+def agent(tmp_path):
+    """Builds RedisService the way an agent start does, over the same database and base path"""
+    command = run.fake_server_command(str(tmp_path))
+    services = []
+
+    def start():
+        database = Database(str(tmp_path / 'redis_manager.db'))
+        repository = RedisRepository(database)
+        service = RedisService(repository, ProcessRepository(database), base_path=str(tmp_path / 'data'),
+                               redis_command=command, port_allocator=PortAllocator(repository, 17000, 17099))
+        services.append(service)
+        return service
+
+    yield start
+    for service in services:
+        for instance in service.get_all_instances():
+            process = service.find_process(instance)
+            if process:
+                process.kill()
+
+
+def test_start_after_agent_restart_adopts_running_server(agent):
+    first = agent()
+    first.create_instance('a')
+    first.start_instance('a')
+    pid = first.get_instance_status('a')['pid']
+
+    second = agent()
+    report = second.start_all_instances()
+    status = second.get_instance_status('a')
+
+    assert report.failed == {}
+    assert status['running'] and status['pid'] == pid
+    assert status['supervisor'] is None
+
+
+def test_readiness_rejects_a_server_it_did_not_spawn(agent):
+    service = agent()
+    instance = service.create_instance('a')
+    service.start_instance('a')
+
+    other = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+    try:
+        with pytest.raises(RuntimeError, match='not the spawned pid'):
+            service.readiness_probe.wait(other, instance.port, instance.password)
+    finally:
+        other.kill()
+        other.wait()
@@ -0,0 +1,78 @@
+import pytest
+
+from infra.repository import RedisRepository
+from domain.redis.domain import RedisStatus
+from conftest import make_instance
+
+
+def test_find_by_id_is_served_from_cache(repository):
+    repository.save(make_instance('a', 5000))
+    first = repository.find_by_id('a')
+    second = repository.find_by_id('a')
+
+    assert first == second
+    assert repository.cache_stats()['hits'] == 2
+    assert repository.cache_stats()['misses'] == 0
+
+
+def test_cached_instances_are_copies(repository):
+    repository.save(make_instance('a', 5000))
+    instance = repository.find_by_id('a')
+    instance.status = RedisStatus.RUNNING
+
+    assert repository.find_by_id('a').status == RedisStatus.STOPPED
+
+
+def test_find_by_port_follows_port_changes(repository):
+    instance = make_instance('a', 5000)
+    repository.save(instance)
+    assert repository.find_by_port(5000).id == 'a'
+
+    instance.port = 5001
+    repository.save(instance)
+    assert repository.find_by_port(5000) is None
+    assert repository.find_by_port(5001).id == 'a'
+
+
+def test_writes_update_cache(repository):
+    repository.save_many([make_instance('a', 5000), make_instance('b', 5001)])
+    repository.update_status('a', RedisStatus.RUNNING)
+    repository.update_service_status('a', 1)
+    repository.delete('b')
+
+    instance = repository.find_by_id('a')
+    assert (instance.status, instance.service_status) == (RedisStatus.RUNNING, 1)
+    assert repository.find_by_id('b') is None
+    assert [instance.id for instance in repository.find_all()] == ['a']
+
+
+def test_rolled_back_transaction_invalidates_cache(repository):
+    repository.save(make_instance('a', 5000))
+    with pytest.raises(RuntimeError):
+        with repository.transaction():
+            repository.update_status('a', RedisStatus.RUNNING)
+            raise RuntimeError('abort')
+
+    assert repository.find_by_id('a').status == RedisStatus.STOPPED
+
+
+def test_fill_from_before_a_write_is_discarded(repository):
+    repository.save(make_instance('a', 5000))
+    repository.invalidate_cache()
+    # A reader that started before the write must not put its stale copy back
+    generation = repository._generation
+    stale = repository.find_by_id('a')
+    repository.update_status('a', RedisStatus.RUNNING)
+    repository.invalidate_cache()
+    repository._cache_fill([stale], generation)
+
+    assert repository.find_by_id('a').status == RedisStatus.RUNNING
+
+
+def test_cache_ttl_sees_writes_of_other_processes(database):
+    ours = RedisRepository(database, cache_ttl=0)
+    other = RedisRepository(database)
+    ours.save(make_instance('a', 5000))
+    other.update_status('a', RedisStatus.RUNNING)
+
+    assert ours.find_by_id('a').status == RedisStatus.RUNNING
@@ -0,0 +1,95 @@
+import subprocess
+import sys
+import time
+
+from domain.process.supervisor import ProcessSupervisor
+
+
+def spawn(code: str) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, '-c', code])
+
+
+def wait_for(condition, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condition not reached in time'
+        time.sleep(0.01)
+
+
+def crashing_supervisor(crash_loop_limit: int = 3):
+    supervisor = ProcessSupervisor(base_backoff=0.01, max_backoff=0.05, crash_loop_limit=crash_loop_limit)
+    restarts = []
+
+    def restart(redis_id):
+        restarts.append(redis_id)
+        supervisor.attach(redis_id, spawn('raise SystemExit(1)'))
+
+    supervisor.set_restart_handler(restart)
+    return supervisor, restarts
+
+
+def test_crashes_are_restarted_until_crash_loop():
+    supervisor, restarts = crashing_supervisor(crash_loop_limit=3)
+    supervisor.attach('a', spawn('raise SystemExit(1)'))
+
+    wait_for(lambda: supervisor.status('a')['state'] == 'crash_loop')
+    status = supervisor.status('a')
+    assert len(restarts) == 3
+    assert status['restart_count'] == 3
+    assert status['recent_crashes'] == 4
+    assert status['last_exit_code'] == 1
+
+
+def test_crash_during_restart_is_counted_once():
+    supervisor = ProcessSupervisor(base_backoff=0.01, max_backoff=0.05, crash_loop_limit=3)
+    attempts = []
+
+    def restart(redis_id):
+        # The child dies while the restart attempt is still running
+        process = spawn('raise SystemExit(1)')
+        supervisor.attach(redis_id, process)
+        process.wait()
+        time.sleep(0.05)
+        attempts.append(redis_id)
+
+    supervisor.set_restart_handler(restart)
+    supervisor.attach('a', spawn('raise SystemExit(1)'))
+
+    wait_for(lambda: supervisor.status('a')['state'] == 'crash_loop')
+    assert len(attempts) == 3
+    assert supervisor.status('a')['recent_crashes'] == 4
+
+
+def test_stop_is_not_restarted():
+    supervisor, restarts = crashing_supervisor()
+    supervisor.attach('a', spawn('import time; time.sleep(30)'))
+
+    assert supervisor.stop('a')
+    time.sleep(0.1)
+    assert supervisor.status('a')['state'] == 'stopped'
+    assert restarts == []
+    assert not supervisor.owns('a')
+
+
+def test_failing_restart_handler_backs_off():
+    supervisor = ProcessSupervisor(base_backoff=0.01, max_backoff=0.05, crash_loop_limit=2)
+    calls = []
+
+    def restart(redis_id):
+        calls.append(redis_id)
+        raise RuntimeError('port in use')
+
+    supervisor.set_restart_handler(restart)
+    supervisor.attach('a', spawn('raise SystemExit(1)'))
+
+    wait_for(lambda: supervisor.status('a')['state'] == 'crash_loop')
+    assert len(calls) == 2
+
+
+def test_forget_drops_the_record():
+    supervisor, _ = crashing_supervisor()
+    supervisor.attach('a', spawn('import time; time.sleep(30)'))
+    supervisor.stop('a', kill=True)
+    supervisor.forget('a')
+
+    assert supervisor.status('a') is None